@@ -0,0 +1,5 @@
+"""
+Benchmarks for the per-call overhead of MyDiPy.
+
+Run with `python -m benchmarks run` from the repository root. See `python -m benchmarks --help`.
+"""
@@ -0,0 +1,43 @@
+import argparse
+import sys
+from . import core, calls, startup, threads
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Measure the per-call overhead of MyDiPy')
+    sub = parser.add_subparsers(dest='command')
+
+    run = sub.add_parser('run', help='run benchmarks and write machine-readable results')
+    run.add_argument('cases', nargs='*', help='prefixes of the cases to run (default all)')
+    run.add_argument('-o', '--output', help='write JSON results to this file')
+    run.add_argument('--repeat', type=int, default=5, help='timing runs per case, the best is kept')
+    run.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per timing run')
+
+    cmp = sub.add_parser('compare', help='compare two JSON results')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=0.1, help='relative slowdown reported as a regression')
+
+    sub.add_parser('list', help='list the available cases')
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # `add_subparsers(required=True)` needs Python 3.7
+        parser.error('a command is required')
+    if args.command == 'list':
+        for name, (func, grid) in core.CASES.items():
+            print(name, ' '.join('{}={}'.format(k, v) for k, v in grid.items()))
+    elif args.command == 'run':
+        data = core.run(args.cases, repeat=args.repeat, min_time=args.min_time)
+        for r in data['results']:
+            print('{:<48} {:>10.1f} ns {:>8} B {:>6.2f} blocks'.format(
+                core._key(r), r['ns_per_call'], r['alloc_peak_bytes'], r['alloc_blocks']))
+        if args.output:
+            core.dump(data, args.output)
+    elif args.command == 'compare':
+        lines, regressed = core.compare(core.load(args.old), core.load(args.new), args.threshold)
+        print('\n'.join(lines))
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
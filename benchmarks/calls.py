@@ -0,0 +1,177 @@
+"""
+Per-call overhead of type checking, overload dispatch, inheritance, casting and typed attributes.
+"""
+import re
+from .core import case
+from mydipy import type_check, inherit, OverloadObject, OverloadFunction, cast, to
+
+def _hierarchy(depth):
+    """A chain of `depth` classes deriving from one another, from the root down"""
+    classes = [type('Level0', (), {})]
+    for i in range(1, depth):
+        classes.append(type('Level{}'.format(i), (classes[-1],), {}))
+    return classes
+
+@case('type_check.call', typed=[False, True])
+def type_check_call(typed):
+    def fnc(a: int, b: str, c: float = 1.0) -> int:
+        return a
+    if typed:
+        fnc = type_check(fnc)
+    return lambda: fnc(1, 'b', c=2.0)
+
+@case('type_check.coroutine', typed=[False, True])
+def type_check_coroutine(typed):
+    async def fnc(a: int, b: str) -> int:
+        return a
+    if typed:
+        fnc = type_check(fnc)
+    # Creates the coroutine without running it
+    return lambda: fnc(1, 'b').close()
+
+@case('type_check.returns')
+def type_check_returns():
+    @type_check
+    def fnc(a: int) -> int:
+        return a
+    return lambda: fnc(1, _returns=int)
+
+@case('overload.function', overloads=[1, 4, 16, 64])
+def overload_function(overloads):
+    # Each overload accepts a different class, the call matches the last one
+    classes = [type('T{}'.format(i), (), {}) for i in range(overloads)]
+    def make(typ):
+        def fnc(val: typ) -> int:
+            return 0
+        return fnc
+    fnc = OverloadFunction(make(classes[0]))
+    for typ in classes[1:]:
+        fnc.overload(make(typ))
+    arg = classes[-1]()
+    return lambda: fnc(arg)
+
+@case('overload.method', overloads=[2, 8, 32])
+def overload_method(overloads):
+    namespace = OverloadObject.__class__.__prepare__('Bench', (OverloadObject,))
+    classes = [type('T{}'.format(i), (), {}) for i in range(overloads)]
+    for typ in classes:
+        exec('def test(self, val: typ) -> int: return 0', {'typ': typ}, namespace)
+    cls = OverloadObject.__class__('Bench', (OverloadObject,), namespace)
+    inst, arg = cls(), classes[-1]()
+    return lambda: inst.test(arg)
+
+@case('overload.depth', depth=[1, 4, 16])
+def overload_depth(depth):
+    # Dispatch on an argument deep in a class hierarchy, from a method deep in an OverloadObject hierarchy
+    levels = _hierarchy(depth)
+    base, arg = levels[0], levels[-1]()
+    class Root(OverloadObject):
+        def test(self, val: int) -> int: return 0
+        def test(self, val: base) -> int: return 1
+    cls = Root
+    for i in range(depth):
+        cls = type(cls)('Child{}'.format(i), (cls,), {})
+    inst = cls()
+    return lambda: inst.test(arg)
+
+@case('overload.returns')
+def overload_returns():
+    class Bench(OverloadObject):
+        def test(self, val: int) -> int: return 0
+        def test(self, val: int) -> float: return 0.0
+        def test(self, val: int) -> str: return ''
+    inst = Bench()
+    return lambda: inst.test(1, _returns=str)
+
+@case('overload.batch', mode=['loop', 'map'])
+def overload_batch(mode):
+    # 100 calls spread over 4 overloads, one at a time or grouped by the types of their arguments
+    @OverloadFunction
+    def fnc(a: int, b: str) -> int: return 0
+    @fnc.overload
+    def fnc(a: str, b: int) -> int: return 1
+    @fnc.overload
+    def fnc(a: float, b: float) -> int: return 2
+    @fnc.overload
+    def fnc(a, b) -> int: return 3
+    calls = [(1, 'a'), ('a', 1), (1.0, 2.0), (None, None)] * 25
+    if mode == 'map':
+        return lambda: fnc.map(calls)
+    return lambda: [fnc(*args) for args in calls]
+
+@case('inherit.call', typed=[False, True])
+def inherit_call(typed):
+    class Parent(OverloadObject if typed else object):
+        def test(self, val: int) -> int:
+            return val
+    class Child(Parent):
+        @inherit
+        def test(self, val: int) -> int: ...
+    inst = Child()
+    return lambda: inst.test(1)
+
+class _Castable(OverloadObject):
+    def __str__(self):
+        return 'castable'
+
+class _Inherited(_Castable):
+    # Its own overload, and those of OverloadObject through @inherit
+    def __cast__(self) -> float:
+        return 1.0
+    @inherit
+    def __cast__(self): ...
+
+class _Untyped:
+    def __cast__(self):
+        return 'untyped'
+
+@case('cast.path', path=['identity', 'typed', 'inherited', 'untyped', 'automatic', 'constructor', 'failure'])
+def cast_path(path):
+    cls, obj = {
+        'identity': (int, 1),
+        'typed': (str, _Castable()),
+        'inherited': (str, _Inherited()),
+        'untyped': (str, _Untyped()),
+        'automatic': (re, 'a+'),
+        'constructor': (str, 5.1),
+        'failure': (int, object()),
+    }[path]
+    if path == 'failure':
+        def call():
+            try:
+                cast(cls, obj)
+            except NotImplementedError:
+                pass
+        return call
+    return lambda: cast(cls, obj)
+
+@case('cast.to')
+def cast_to():
+    return lambda: to(5.1, str)
+
+@case('setattr', kind=['object', 'unannotated', 'annotated', 'slots'])
+def setattr_(kind):
+    if kind == 'object':
+        class Bench:
+            pass
+    elif kind == 'slots':
+        class Bench(OverloadObject, slots=True):
+            value: int
+    else:
+        class Bench(OverloadObject):
+            value: int
+    inst = Bench()
+    name = 'value' if kind in ('annotated', 'slots') else 'other'
+    return lambda: setattr(inst, name, 1)
+
+@case('record', slots=[False, True])
+def record(slots):
+    class Bench(OverloadObject, slots=slots):
+        x: int
+        y: float
+        name: str
+        def __init__(self, x, y, name):
+            self.x = x
+            self.y = y
+            self.name = name
+    return lambda: Bench(1, 2.0, 'a')
@@ -0,0 +1,152 @@
+"""
+Timing/allocation harness shared by the benchmarks.
+
+Benchmarks are registered with `@case`. A case is a function taking its parameters as keyword
+arguments and returning a zero-argument callable which performs one call of whatever is measured.
+"""
+import gc
+import json
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from itertools import product
+
+# Registered cases, by name
+CASES = {}
+
+def case(name, **grid):
+    """
+    Register a benchmark case.
+
+    Args:
+        name: Name of the case, conventionally `<area>.<what>`
+        grid: Parameter name to a list of values. The case is run once for every combination.
+    """
+    def decorator(func):
+        CASES[name] = (func, grid)
+        return func
+    return decorator
+
+def _time(call, repeat, min_time):
+    """Best time of `repeat` runs, in nanoseconds per call"""
+    timer = timeit.Timer(call)
+    # Enough calls that a single run takes at least `min_time` seconds
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    gc.collect()
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+def _allocations(call, number):
+    """
+    Memory allocated per call, as measured by tracemalloc.
+
+    tracemalloc only sees live memory, so this reports the transient high-water mark of a single
+    call (`alloc_peak_bytes`) and the memory blocks still alive after a call (`alloc_blocks`),
+    which catches leaks and unbounded cache growth.
+    """
+    # Warm up any lazily built state so it isn't counted
+    call()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(number):
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            else:
+                # Before Python 3.9, restarting is the only way to reset the peak
+                tracemalloc.stop()
+                tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            call()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+
+        before = tracemalloc.take_snapshot()
+        for _ in range(number):
+            call()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(s.count_diff for s in after.compare_to(before, 'filename'))
+    return peak, blocks / number
+
+def _revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(names=None, repeat=5, min_time=0.05, allocs=100):
+    """
+    Run the registered cases.
+
+    Args:
+        names: Prefixes of case names to run, all cases if None
+        repeat: Number of timing runs, the best is kept
+        min_time: Minimum duration of one timing run in seconds
+        allocs: Number of calls used when measuring allocations
+
+    Returns:
+        A JSON-serializable dictionary of the environment and results
+    """
+    results = []
+    for name, (func, grid) in CASES.items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        keys = list(grid)
+        for values in product(*(grid[k] for k in keys)):
+            params = dict(zip(keys, values))
+            call = func(**params)
+            peak, blocks = _allocations(call, allocs)
+            results.append({
+                'name': name,
+                'params': params,
+                'ns_per_call': _time(call, repeat, min_time),
+                'alloc_peak_bytes': peak,
+                'alloc_blocks': blocks,
+            })
+    return {
+        'revision': _revision(),
+        'python': sys.version,
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        # False on free-threaded builds with the GIL disabled
+        'gil': getattr(sys, '_is_gil_enabled', lambda: True)(),
+        'results': results,
+    }
+
+def _key(result):
+    return result['name'] + ''.join('[{}={}]'.format(k, v) for k, v in result['params'].items())
+
+def compare(old, new, threshold=0.1):
+    """
+    Compare two results of `run`.
+
+    Returns:
+        Lines of a table of per-call times, and whether any case is slower by more than `threshold`
+    """
+    old = {_key(r): r for r in old['results']}
+    lines = ['{:<48} {:>12} {:>12} {:>8}'.format('case', 'old ns', 'new ns', 'ratio')]
+    regressed = False
+    for r in new['results']:
+        key = _key(r)
+        if key not in old:
+            lines.append('{:<48} {:>12} {:>12.1f} {:>8}'.format(key, '-', r['ns_per_call'], '-'))
+            continue
+        ratio = r['ns_per_call'] / old[key]['ns_per_call']
+        regressed |= ratio > 1 + threshold
+        lines.append('{:<48} {:>12.1f} {:>12.1f} {:>8.2f}'.format(key, old[key]['ns_per_call'], r['ns_per_call'], ratio))
+    return lines, regressed
+
+def dump(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,60 @@
+"""
+Cold-start cost: importing MyDiPy and creating `TypedMeta` classes, eagerly and lazily compiled.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from .core import case
+from mydipy import OverloadObject, set_compilation, get_compilation
+
+# Code run in a fresh interpreter by `startup.import`
+_IMPORTS = {
+    'none': 'pass',
+    'mydipy': 'import mydipy',
+    'OverloadObject': 'from mydipy import OverloadObject',
+}
+
+@case('startup.import', module=list(_IMPORTS), compilation=['eager', 'lazy'])
+def startup_import(module, compilation):
+    # Includes starting the interpreter, which `module=none` measures on its own
+    command = [sys.executable, '-c', _IMPORTS[module]]
+    env = dict(os.environ, MYDIPY_COMPILATION=compilation)
+    return lambda: subprocess.run(command, env=env, check=True)
+
+@case('startup.class', methods=[1, 10, 50], compilation=['eager', 'lazy'])
+def startup_class(methods, compilation):
+    source = ''.join(
+        '    def method{i}(self, val: int) -> int: return val\n'
+        '    def method{i}(self, val: str) -> str: return val\n'
+        '    def method{i}(self, val: float) -> float: return val\n'.format(i=i)
+        for i in range(methods))
+    code = compile('class Model(OverloadObject):\n'+source, '<model>', 'exec')
+    def call():
+        previous = get_compilation()
+        set_compilation(compilation)
+        try:
+            exec(code, {'OverloadObject': OverloadObject})
+        finally:
+            set_compilation(previous)
+    return call
+
+# Directory of the module imported by `startup.model`, written on first use
+_MODEL = []
+
+@case('startup.model', cache=[False, True])
+def startup_model(cache):
+    # A fresh interpreter importing a module of 50 overloaded methods, whose compiled checks are
+    # kept on disk when cached. Bytecode is written for both so only the checks differ
+    if not _MODEL:
+        _MODEL.append(tempfile.mkdtemp())
+        with open(os.path.join(_MODEL[0], 'model.py'), 'w') as f:
+            f.write('from mydipy import OverloadObject\nclass Model(OverloadObject):\n' + ''.join(
+                '    def method{i}(self, val: int, k{i}: str = "") -> int: return val\n'
+                '    def method{i}(self, val: str, *args: int) -> str: return val\n'
+                '    def method{i}(self, val: float, *, key{i}: float = 1.0) -> float: return val\n'.format(i=i)
+                for i in range(50)))
+    command = [sys.executable, '-c', 'import mydipy; mydipy.set_compilation(cache={}); import model'.format(cache)]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([_MODEL[0]] + sys.path))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return lambda: subprocess.run(command, env=env, check=True)
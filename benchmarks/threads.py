@@ -0,0 +1,46 @@
+"""
+Scaling of typed calls across threads. Each call of a case makes the same total number of calls,
+split evenly between the threads, so on a free-threaded build the time should fall as threads are added.
+Each call runs them in a pool of its own, which is shut down before it returns, so starting the threads is
+included in the time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from .core import case
+from mydipy import type_check, OverloadFunction, cast
+
+# Calls made by one call of a case, between all the threads
+_CALLS = 2000
+
+def _typed():
+    @type_check
+    def fnc(a: int, b: str) -> int:
+        return a
+    return lambda: fnc(1, 'b')
+
+def _overload():
+    def make(typ):
+        def fnc(val: typ) -> typ:
+            return val
+        return fnc
+    fnc = OverloadFunction(make(str))
+    fnc.overload(make(float))
+    fnc.overload(make(int))
+    return lambda: fnc(1)
+
+def _cast():
+    return lambda: cast(str, 1)
+
+_KINDS = {'type_check': _typed, 'overload': _overload, 'cast': _cast}
+
+@case('threads.scaling', kind=list(_KINDS), threads=[1, 2, 4, 8])
+def threads_scaling(kind, threads):
+    call = _KINDS[kind]()
+    calls = _CALLS // threads
+    def work():
+        for _ in range(calls):
+            call()
+    def run():
+        with ThreadPoolExecutor(threads) as pool:
+            for future in [pool.submit(work) for _ in range(threads)]:
+                future.result()
+    return run
@@ -1,6 +1,43 @@
-from .type_check import type_check, no_type_check, TypeCheckError
-from .inherit import inherit
-from .typed import  TypedMeta, OverloadObject, OverloadFunction, overload
-from .cast import cast, to
+import sys
+from importlib import import_module
+from types import ModuleType
 
-__all__ = ["type_check","no_type_check","TypeCheckError","inherit","TypedMeta","OverloadObject","OverloadFunction","overload","cast","to"]
\ No newline at end of file
+# Module defining each public name. Modules are only imported once one of their names is first used
+_modules = {
+    "type_check": ".type_check", "no_type_check": ".type_check", "TypeCheckError": ".type_check",
+    "set_enforcement": ".type_check", "get_enforcement": ".type_check",
+    "set_compilation": ".type_check", "get_compilation": ".type_check",
+    "set_container_checks": ".generic", "get_container_checks": ".generic",
+    "inherit": ".inherit",
+    "TypedMeta": ".typed", "OverloadObject": ".typed", "OverloadFunction": ".typed", "overload": ".typed",
+    "OverloadWarning": ".typed",
+    "cast": ".cast", "to": ".cast", "cast_many": ".cast", "cast_iter": ".cast",
+    "stats": ".stats",
+}
+
+__all__ = ["type_check","no_type_check","TypeCheckError","set_enforcement","get_enforcement","set_compilation","get_compilation","set_container_checks","get_container_checks","inherit","TypedMeta","OverloadObject","OverloadFunction","overload","OverloadWarning","cast","to","cast_many","cast_iter","stats"]
+
+class _Package(ModuleType):
+    """
+    Private class. Don't use directly.
+    This package, importing the module defining a public name when the name is first used
+    """
+    def __getattr__(self, name):
+        if name not in _modules:
+            raise AttributeError('module {mod!r} has no attribute {name!r}'.format(mod=self.__name__,name=name))
+        module = import_module(_modules[name],self.__name__)
+        value = module if module.__name__ == self.__name__+'.'+name and not hasattr(module,name) else getattr(module,name)
+        super().__setattr__(name,value)
+        return value
+
+    def __setattr__(self, name, value):
+        # Importing a submodule sets it as an attribute of the package, which mustn't hide the
+        # function of the same name it defines (`type_check`, `inherit` and `cast`)
+        if isinstance(value,ModuleType) and _modules.get(name) == '.'+name and hasattr(value,name):
+            return
+        super().__setattr__(name,value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__())|set(__all__))
+
+sys.modules[__name__].__class__ = _Package
@@ -1,11 +1,68 @@
 import re
+import sys
+import threading
+from heapq import heappush, heappop
+from itertools import count
 from typing import Iterable, Any, Type
 from infix import make_infix
+from . import stats as _stats
+
+class _Conversions(dict):
+    """
+    Private class. Don't use directly.
+    A dictionary which forgets the cached `cast` routes whenever it changes
+    """
+    def __setitem__(self, key, value):
+        super().__setitem__(key,value)
+        _invalidate(False)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        _invalidate(False)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def _changed(method):
+        def changed(self, *args, **kwargs):
+            try:
+                return method(self,*args,**kwargs)
+            finally:
+                _invalidate(False)
+        changed.__name__ = method.__name__
+        return changed
+
+    update = _changed(dict.update)
+    pop = _changed(dict.pop)
+    popitem = _changed(dict.popitem)
+    setdefault = _changed(dict.setdefault)
+    clear = _changed(dict.clear)
+    del _changed
 
 # Map of Classes/Modules to functions which MIGHT convert them
-AUTOMATIC_CONVERSIONS = {
+AUTOMATIC_CONVERSIONS = _Conversions({
     re: re.compile
-}
+})
+
+# Cached routes by (source type, target class), see `_route`
+_routes = {}
+
+# Maximum number of entries of `_routes`
+_ROUTES_SIZE = 4096
+
+# Registered converters by source class, as tuples of (target class, cost, function), see `cast.register`.
+# Replaced rather than appended to, so they can be read while a converter is registered
+_converters = {}
+
+# Shortest paths from each source class, see `_shortest`. Forgotten whenever a converter is registered
+_paths = {}
+
+# Held while changing the caches above. They are read without it
+_lock = threading.Lock()
+
+# Incremented whenever how to cast changes, so routes worked out before then aren't cached, see `_remember`
+_generation = 0
 
 def cast(cls: Type, obj):
     """
@@ -22,6 +79,17 @@ def cast(cls: Type, obj):
     While the `-to>>` format is easy to read, be careful as subtraction and bitshift operators
     are in the middle of operator precedence. If using the infix, always use parentheses!
 
+    The way an object is converted only depends on its type and the target class, so it is worked
+    out once per pair of classes and cached. Passing the object to the constructor of the target
+    is the last resort, which is tried again for each object as it may only accept some values
+    (e.g. `dict`). Like other magic methods, `__cast__` is looked up on the class of the object. If a class is changed after
+    casting to or from it, call `cast.cache_clear()`. `cast.compile(src, dst)` returns the converter
+    used for objects of class `src`.
+
+    Converters between classes can be registered with `cast.register(src, dst)`. When a chain of them
+    (optionally finishing with a typed `__cast__`) is cheaper than converting directly, the cheapest
+    chain is used.
+
     Args:
         cls: Type to cast to
         obj: An object to be cast
@@ -39,39 +107,436 @@ def cast(cls: Type, obj):
         >>> cast(str, a) == a.__str__()
         True
     """
+    if _stats._enabled:
+        return _cast_instrumented(cls,obj)
     # If we are already done. Do nothing:
-    if cls is Any or type(obj) == cls:
+    if type(obj) is cls:
         return obj
+    try:
+        route = _routes[type(obj),cls]
+    except KeyError:
+        route = _route(type(obj),cls)
+    except TypeError:
+        # Unhashable target, such as a list of classes
+        route = _route(type(obj),cls,False)
+    return route(obj)
+
+def _cast_instrumented(cls, obj):
+    """
+    Private method. Don't use directly.
+    `cast`, recording the path taken in the statistics
+    """
+    rec = _stats._record('cast','{}->{}'.format(_stats._name(type(obj)),_stats._name(cls)))
+    rec.calls += 1
+    try:
+        route = _routes[type(obj),cls]
+    except KeyError:
+        rec.misses += 1
+        route = _route(type(obj),cls)
+    except TypeError:
+        route = _route(type(obj),cls,False)
+    if route.path == 'constructor':
+        try:
+            res = route(obj)
+        except NotImplementedError:
+            rec.errors += 1
+            rec.paths['failed'] += 1
+            raise
+    else:
+        res = route(obj)
+    rec.paths[route.path] += 1
+    return res
+
+def _compile(src: Type, dst: Type):
+    """
+    A converter of objects of class `src` to class `dst`, taking the object and returning it cast.
+
+    Equivalent to `lambda obj: cast(dst, obj)` for objects whose class is exactly `src`, without
+    looking up the route on each call.
+
+    Args:
+        src: Class of the objects to be cast
+        dst: Type to cast to
+
+    Returns:
+        The converter. If there is no way to convert it raises `NotImplementedError` when called
+
+    Example:
+        >>> to_str = cast.compile(float, str)
+        >>> to_str(5.1)
+        '5.1'
+    """
+    try:
+        return _routes[src,dst]
+    except KeyError:
+        return _route(src,dst)
+    except TypeError:
+        return _route(src,dst,False)
+
+def cast_many(cls: Type, values: Iterable):
+    """
+    Cast every object of `values` to `cls`, as `[cast(cls, obj) for obj in values]` would.
+
+    How to cast is only worked out once per distinct class of the objects, rather than per object.
+    If `values` is a NumPy array of booleans or numbers and `cls` is a numeric type (`int`, `float`,
+    `complex`, `bool`, a NumPy scalar type) or a NumPy dtype, it is converted at once with
+    `values.astype(cls)`, and an array is returned instead of a list. Floats are only converted to
+    integers that way if they all fit, as `astype` doesn't report NaN, infinity or overflow.
+
+    Args:
+        cls: Type to cast to
+        values: Objects to be cast
+
+    Returns:
+        A list of the objects cast to the target class, or an array for NumPy arrays
+
+    Raises:
+        NotImplementedError: If an object cannot be converted
+
+    Example:
+        >>> cast_many(str, [1, 2.5, 'a'])
+        ['1', '2.5', 'a']
+    """
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(values,numpy.ndarray) and _numeric(numpy,cls,values):
+        return values.astype(cls)
+    if _stats._enabled:
+        return [cast(cls,obj) for obj in values]
+    # Routes by class of the objects
+    routes = {}
+    res = []
+    for obj in values:
+        route = routes.get(type(obj))
+        if route is None:
+            route = routes[type(obj)] = _compile(type(obj),cls)
+        res.append(route(obj))
+    return res
+
+def cast_iter(cls: Type, values: Iterable):
+    """
+    Lazily cast the objects of `values` to `cls`, one at a time.
+
+    The streaming form of `cast_many`, for iterables which are too large to hold in memory.
+    How to cast is only worked out once per distinct class of the objects.
+
+    Args:
+        cls: Type to cast to
+        values: Objects to be cast
+
+    Yields:
+        Each object cast to the target class
+
+    Raises:
+        NotImplementedError: If an object cannot be converted
+    """
+    routes = {}
+    for obj in values:
+        if _stats._enabled:
+            yield cast(cls,obj)
+            continue
+        route = routes.get(type(obj))
+        if route is None:
+            route = routes[type(obj)] = _compile(type(obj),cls)
+        yield route(obj)
+
+def _numeric(numpy, cls, values) -> bool:
+    """
+    Private method. Don't use directly.
+
+    Whether the NumPy array `values` can be cast to `cls` with `astype`, giving the same values as
+    casting each element. Other arrays (e.g. of objects or strings) are cast one element at a time,
+    so `__cast__`, registered converters and errors work as for lists.
+    """
+    if values.dtype.kind not in 'biuf':
+        return False
+    if not (cls in (int,float,complex,bool) or isinstance(cls,numpy.dtype) or
+            (isinstance(cls,type) and issubclass(cls,numpy.number))):
+        return False
+    try:
+        target = numpy.dtype(cls)
+    except TypeError:
+        # Abstract scalar types, such as `numpy.integer`
+        return False
+    if values.dtype.kind == 'f' and target.kind in 'iu':
+        # NaN and infinity fail both comparisons. The largest integer isn't exactly a float, one more is
+        info = numpy.iinfo(target)
+        return bool(((values >= info.min) & (values < info.max+1)).all())
+    return True
+
+def _register(src: Type, dst: Type, func=None, cost=1):
+    """
+    Register a converter from objects of class `src` (or its subclasses) to class `dst`.
+
+    `cast` then finds the cheapest chain of converters to the target class. For example, with
+    converters from `Euro` to `Dollar` and from `Dollar` to `Pound`, `cast(Pound, Euro(3))` converts
+    through `Dollar`. Typed `__cast__` overloads with a return annotation are also part of the chains.
+
+    Args:
+        src: Class of the objects converted
+        dst: Class of the objects returned
+        func: Converter taking the object and returning it converted. If omitted, returns a decorator
+        cost: Relative cost of the conversion, which must not be negative
+
+    Returns:
+        `func`
+
+    Raises:
+        TypeError: If the source or target isn't a class
+        ValueError: If the cost is negative
+
+    Example:
+        >>> @cast.register(Euro, Dollar)
+        ... def euro_to_dollar(obj):
+        ...     return Dollar(obj.value * obj.exchange_ratio)
+    """
+    if func is None:
+        return lambda func: _register(src,dst,func,cost)
+    if not isinstance(src,type) or not isinstance(dst,type):
+        raise TypeError('converters must be between classes, not {src!r} and {dst!r}'.format(src=src,dst=dst))
+    if cost < 0:
+        raise ValueError('converters need a cost of zero or more, not {cost!r}'.format(cost=cost))
+    with _lock:
+        _converters[src] = _converters.get(src,())+((dst,cost,func),)
+    _invalidate()
+    return func
+
+def _unregister(src: Type, dst: Type, func=None):
+    """
+    Remove the converters from class `src` to class `dst` registered with `cast.register`.
+
+    Args:
+        src: Class of the objects converted
+        dst: Class of the objects returned
+        func: The converter to remove. If omitted, every converter from `src` to `dst` is removed
+
+    Raises:
+        KeyError: If there isn't such a converter
+    """
+    with _lock:
+        converters = _converters.get(src,())
+        kept = tuple(c for c in converters if c[0] is not dst or (func is not None and c[2] is not func))
+        if len(kept) == len(converters):
+            raise KeyError('no converter from {src!r} to {dst!r} is registered'.format(src=src,dst=dst))
+        if kept:
+            _converters[src] = kept
+        else:
+            del _converters[src]
+    _invalidate()
+
+def _cache_clear():
+    """Forget how to cast between classes, for when a class changed after casting to or from it"""
+    _invalidate()
+
+def _invalidate(paths=True):
+    """
+    Private method. Don't use directly.
+    Forget the cached routes, and the shortest paths if `paths`, as how to cast changed
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        if paths:
+            _paths.clear()
+        _routes.clear()
+
+cast.compile = _compile
+cast.register = _register
+cast.unregister = _unregister
+cast.cache_clear = _cache_clear
+
+def _edges(node):
+    """
+    Private method. Don't use directly.
+    Conversions of objects of class `node`, as (target class, cost, function, whether it was registered)
+    """
+    res = [(dst,cost,func,True) for base in node.__mro__ for dst,cost,func in _converters.get(base,())]
+    method = getattr(node,'__cast__',None)
+    if getattr(method,'__typed__',False):
+        # Typed __cast__ overloads (possibly merged) which declare what they return
+        ret = getattr(method,'__annotations__',{}).get('return',())
+        for typ in (ret if isinstance(ret,tuple) else (ret,)):
+            if isinstance(typ,type) and typ is not node:
+                res.append((typ,1,lambda obj, typ=typ: obj.__cast__(_returns=typ),False))
+    return res
+
+def _shortest(src) -> dict:
+    """
+    Private method. Don't use directly.
+
+    Cheapest chains of conversions from objects of class `src`, found with Dijkstra's algorithm
+    and cached until a converter is registered.
+
+    Returns:
+        A dictionary of reachable class to (cost, hops, functions to apply in order, number of registered converters)
+    """
+    try:
+        return _paths[src]
+    except KeyError:
+        pass
+    generation = _generation
+    best = {src: (0,0,(),0)}
+    order = count()
+    heap = [(0,0,next(order),src)]
+    done = set()
+    while heap:
+        cost,hops,_,node = heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        steps,registered = best[node][2:]
+        for dst,c,func,reg in _edges(node):
+            if dst not in best or (cost+c,hops+1) < best[dst][:2]:
+                best[dst] = (cost+c,hops+1,steps+(func,),registered+reg)
+                heappush(heap,(cost+c,hops+1,next(order),dst))
+    with _lock:
+        if generation == _generation:
+            _paths[src] = best
+    return best
+
+def _chain(src, cls):
+    """
+    Private method. Don't use directly.
+    Route through the cheapest chain of conversions from `src` to `cls`, or None if it doesn't use any registered converter
+    """
+    if not _converters:
+        return None
+    found = None
+    try:
+        for node,path in _shortest(src).items():
+            if node is not src and issubclass(node,cls) and (found is None or path[:2] < found[:2]):
+                found = path
+    except TypeError:
+        # Not a class
+        return None
+    if found is None or not found[3]:
+        # Converting directly is at least as cheap
+        return None
+    steps = found[2]
+    if len(steps) == 1:
+        return _path('converters',lambda obj, convert=steps[0]: convert(obj))
+    def convert(obj):
+        for step in steps:
+            obj = step(obj)
+        return obj
+    return _path('converters',convert)
+
+def _route(src, cls, cache=True):
+    """
+    Private method. Don't use directly.
+
+    Work out how to cast objects of class `src` to `cls`, trying in order:
+        * Nothing, if they are already of that class
+        * The cheapest chain of converters, if it uses registered ones
+        * `__cast__`, with the target as return type if it is typed (see `_typed`)
+        * `AUTOMATIC_CONVERSIONS`
+        * The constructor of `cls`
+
+    Returns:
+        A function taking the object and returning it converted, whose `path` is the name of the route
+    """
+    generation = _generation
+    # If there are registered converters which get us there
+    chain = None if cls is Any or src == cls else _chain(src,cls)
+
+    # If we are already done. Do nothing:
+    if cls is Any or src == cls:
+        route = _path('identity',lambda obj: obj)
+
+    elif chain is not None:
+        route = chain
 
     # If we have an object which looks castable (intentionally not catching errors here as they may be desired)
-    if hasattr(obj,'__cast__'):
+    elif hasattr(src,'__cast__'):
         # If it is typed, we can specify the return type which is what we want
-        if getattr(obj.__cast__,'__typed__',False):
-            return obj.__cast__(_returns=cls)
+        if getattr(src.__cast__,'__typed__',False):
+            # Typed classes know which overload that selects, see `_CastTable`
+            from .typed import _casts
+            table = _casts(src)
+            convert = None if table is None else table[cls]
+            if convert is None:
+                convert = lambda obj: obj.__cast__(_returns=cls)
+            route = _path('__cast__',_typed(cls,convert))
         # If not, we'll just have to call it blindly and it can throw its own errors
         else:
-            return obj.__cast__()
+            route = _path('untyped __cast__',lambda obj: obj.__cast__())
+
+    else:
+        # List of built-in conversion functions which can throw their own errors
+        for k,v in AUTOMATIC_CONVERSIONS.items():
+            try:
+                if cls==k or issubclass(cls,k):
+                    route = _path('automatic',lambda obj, convert=v: convert(obj))
+                    break
+            except TypeError:
+                pass
+        else:
+            route = _constructor(cls)
+
+    if cache:
+        _remember((src,cls),route,generation)
+    return route
 
-    # List of built-in conversion functions which can throw their own errors
-    for k,v in AUTOMATIC_CONVERSIONS.items():
-        if cls==k:
-            return v(obj)
+def _typed(cls, convert):
+    """
+    Private method. Don't use directly.
+
+    Route calling a typed `__cast__` with `convert`, which passes `cls` as the return type. If that
+    doesn't convert the object, `__cast__` is called without a return type and its result is used if
+    it is an instance of `cls` (e.g. from an overload annotated as returning a superclass of `cls`)
+    """
+    def typed(obj):
         try:
-            if issubclass(cls,k):
-                return v(obj)
-        except TypeError:
-            pass
+            return convert(obj)
+        except NotImplementedError:
+            if not isinstance(cls,type):
+                raise
+        res = obj.__cast__()
+        if isinstance(res,cls):
+            return res
+        _fail(obj,cls)
+    return typed
 
+def _constructor(cls):
+    """
+    Private method. Don't use directly.
+    Route passing objects to the constructor of `cls`
+    """
     # If the class we have is castable, it may accept the object in its __init__ (especially if it's typed/overloaded)
     # This is a bit risky, but we're assuming we're only casting to well-behaving objects (this helps for str/int/etc basic types)
-    try:
-        return cls(obj)
-    except:
-        pass
+    def construct(obj):
+        try:
+            return cls(obj)
+        except:
+            # Whether the constructor accepts the object may depend on its value, e.g. `dict`, so this isn't cached
+            pass
+        # We've run out of things to try
+        _fail(obj,cls)
+    return _path('constructor',construct)
 
-    # We've run out of things to try
+def _fail(obj, cls):
     raise NotImplementedError('cannot convert object {obj!r} to {typ!r}'.format(obj=str(obj),typ=str(cls)))
 
+def _path(path, convert):
+    """
+    Private method. Don't use directly.
+    Name the route `convert` as `path`
+    """
+    convert.path = path
+    return convert
+
+def _remember(key, route, generation):
+    """
+    Private method. Don't use directly.
+    Cache `route`, worked out at `generation`, evicting the oldest routes beyond `_ROUTES_SIZE`
+    """
+    with _lock:
+        if generation != _generation:
+            # How to cast changed while it was worked out
+            return
+        _routes[key] = route
+        while len(_routes) > _ROUTES_SIZE:
+            del _routes[next(iter(_routes))]
+
 # Use the infix package to allow this to be used in a cool way (if not necessarily a wise one)
 @make_infix('sub','rshift')
 def to(obj, cls):
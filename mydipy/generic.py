@@ -0,0 +1,327 @@
+"""
+Runtime checks of `typing` generics such as `List[int]`, `Dict[str, X]`, `Optional[X]`, `Union[...]`
+and `Tuple[...]`.
+
+Checking every element of a container would make the cost of a call grow with the size of its
+arguments, so by default only a bounded number of elements of each container are checked.
+See `set_container_checks`.
+"""
+import collections.abc
+import types
+import typing
+import weakref
+from itertools import islice
+from typing import Any
+
+__all__ = ["set_container_checks","get_container_checks"]
+
+# Container checking strategies
+_FIRST, _SAMPLE, _FULL = 'first', 'sample', 'full'
+_STRATEGIES = {s: s for s in (_FIRST, _SAMPLE, _FULL)}
+
+class _Containers:
+    """
+    Private class. Don't use directly.
+    Process-wide container checking settings
+    """
+    __slots__ = ('strategy','count','cache')
+
+    def __init__(self,strategy,count,cache):
+        self.strategy = strategy
+        self.count = count
+        # Maximum number of entries of `_memo`
+        self.cache = cache
+
+_CONTAINERS = _Containers(_FIRST,5,1024)
+
+# Deep checks which immutable containers passed: (id(check), id(value)) -> value, or a weak reference to it
+_memo = {}
+
+# Fewest elements a check must look at before its result is worth memoizing
+_MEMO_MIN = 16
+
+def set_container_checks(strategy=_FIRST, count=5, cache=1024):
+    """
+    Choose how many elements of containers annotated with generics (e.g. `List[int]`) are checked.
+
+    Strategies:
+        * `'first'`: Check the first `count` elements (the default, with `count=5`)
+        * `'sample'`: Check `count` elements chosen at random. Containers which can't be indexed,
+          such as sets and mappings, have their first `count` elements checked instead
+        * `'full'`: Check every element. The cost of a call then grows with the size of its arguments
+
+    The type of the container itself is always checked. Nested containers are checked the same
+    way at each level, as are fixed-length tuples (e.g. `Tuple[int, str]`) which are always checked fully.
+
+    Immutable containers (tuples, frozensets and frozen dataclasses) which pass a deep check of at
+    least 16 elements are remembered, so passing the same large tuple again doesn't check its elements
+    again. Checking fewer is cheaper than remembering them, so this only happens with the `'full'`
+    strategy, or a `count` of 16 or more, not with the default settings. Up to `cache` of them are
+    remembered, oldest first out. Those which can't be weakly referenced, such as tuples,
+    are kept alive while they are remembered. Changing the settings forgets them all.
+
+    Args:
+        strategy: One of the strategies above
+        count: Number of elements to check per container, 0 only checks the type of the container
+        cache: Number of immutable containers to remember, 0 to disable
+
+    Raises:
+        ValueError: If the strategy, count or cache is invalid
+    """
+    if strategy not in _STRATEGIES:
+        raise ValueError('invalid container check strategy {strategy!r}, expected one of {strategies!r}'.format(strategy=strategy,strategies=tuple(_STRATEGIES)))
+    if not isinstance(count,int) or count < 0:
+        raise ValueError('container checks need a count of zero or more elements, not {count!r}'.format(count=count))
+    if not isinstance(cache,int) or cache < 0:
+        raise ValueError('container checks need a cache of zero or more entries, not {cache!r}'.format(cache=cache))
+    _CONTAINERS.strategy = _STRATEGIES[strategy]
+    _CONTAINERS.count = count
+    _CONTAINERS.cache = cache
+    _memo.clear()
+
+def get_container_checks() -> tuple:
+    """The container checking strategy, count and cache size"""
+    return _CONTAINERS.strategy, _CONTAINERS.count, _CONTAINERS.cache
+
+def _random():
+    # `random` is slow to import and only needed by the `'sample'` strategy, so it replaces this on first use
+    global _random
+    from random import random as _random
+    return _random()
+
+def _elements(values):
+    """
+    Private method. Don't use directly.
+    The elements of the container `values` which should be checked
+    """
+    strategy = _CONTAINERS.strategy
+    if strategy is _FULL:
+        return values
+    count = _CONTAINERS.count
+    if strategy is _SAMPLE and (type(values) in (list,tuple) or isinstance(values,collections.abc.Sequence)):
+        n = len(values)
+        if n > count:
+            return [values[int(_random()*n)] for _ in range(count)]
+        return values
+    return islice(values,count)
+
+# Origins whose elements can be checked without consuming them (`Collection` needs Python 3.6)
+_COLLECTIONS = (getattr(collections.abc,'Collection',collections.abc.Sized),)
+_MAPPINGS = (collections.abc.Mapping,)
+
+_UNION_TYPES = (typing.Union,)
+if hasattr(types,'UnionType'):
+    # PEP 604 `int | str`
+    _UNION_TYPES += (types.UnionType,)
+
+def _is_class(annotation) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether `annotation` is a plain class, which `isinstance` can check directly
+    """
+    return isinstance(annotation,type) and getattr(annotation,'__origin__',None) is None \
+        and not isinstance(annotation,getattr(types,'GenericAlias',()))
+
+def _origin(annotation):
+    """
+    Private method. Don't use directly.
+    The class the generic `annotation` (e.g. `List[int]`) parameterizes, or None if it isn't one
+    """
+    origin = getattr(annotation,'__origin__',None)
+    # Before Python 3.7 the origin is the unparameterized generic (`List`), which keeps the class as `__extra__`
+    return getattr(origin,'__extra__',None) or origin
+
+def _union_args(annotation):
+    """
+    Private method. Don't use directly.
+    Members of a union annotation, or None if it isn't one
+    """
+    if getattr(annotation,'__origin__',None) is typing.Union or isinstance(annotation,_UNION_TYPES[1:]):
+        return annotation.__args__
+    return None
+
+def _compile_annotation(annotation):
+    """
+    Private method. Don't use directly.
+
+    Compile an annotation into something which checks values against it.
+
+    Returns:
+        None if anything matches, a class (or tuple of classes) to check with `isinstance`,
+        or otherwise a function taking a value and returning whether it matches
+    """
+    if annotation is Any or annotation is object:
+        return None
+    if _is_class(annotation):
+        return annotation
+
+    # Annotated[T, ...]
+    if hasattr(annotation,'__metadata__'):
+        return _compile_annotation(annotation.__origin__)
+    # NewType
+    if hasattr(annotation,'__supertype__'):
+        return _compile_annotation(annotation.__supertype__)
+    # TypeVar
+    if isinstance(annotation,typing.TypeVar):
+        if annotation.__constraints__:
+            return _compile_annotation(typing.Union[annotation.__constraints__])
+        return None if annotation.__bound__ is None else _compile_annotation(annotation.__bound__)
+    # Forward references can't be resolved here
+    if isinstance(annotation,(str,getattr(typing,'ForwardRef',str))):
+        return None
+
+    members = _union_args(annotation)
+    if members is not None:
+        checks = [_compile_annotation(m) for m in members]
+        if any(c is None for c in checks):
+            return None
+        classes = tuple(k for c in checks if not callable(c) or isinstance(c,type) for k in (c if isinstance(c,tuple) else (c,)))
+        preds = [c for c in checks if callable(c) and not isinstance(c,type)]
+        if not preds:
+            return classes
+        check = lambda v: isinstance(v,classes) or any(p(v) for p in preds)
+        return _stable(check) if all(_is_stable(p) for p in preds) else check
+
+    origin = _origin(annotation)
+    args = getattr(annotation,'__args__',())
+    if origin is None:
+        # Not something we know how to check
+        return annotation if isinstance(annotation,type) else None
+
+    if origin is getattr(typing,'Literal',None):
+        return _stable(lambda v: any(type(v) is type(a) and v == a for a in args))
+    if origin is typing.ClassVar or origin is getattr(typing,'Final',None):
+        return _compile_annotation(args[0]) if args else None
+    if origin is type:
+        # Type[C]
+        if not args:
+            return type
+        check = _compile_annotation(args[0])
+        bases = check if isinstance(check,(type,tuple)) else None
+        return _stable(lambda v: isinstance(v,type) and (bases is None or issubclass(v,bases)))
+    if origin is collections.abc.Callable:
+        return callable
+
+    # Parameters are meaningless if they are all Any or unspecified
+    params = [_compile_annotation(a) for a in args if a is not Ellipsis]
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        # Fixed-length tuple, checked fully as its length is bounded by the annotation
+        if args == ((),):
+            params = []
+        return _fixed_tuple(params)
+    if not isinstance(origin,type):
+        return None
+    if all(p is None for p in params) or not issubclass(origin,_COLLECTIONS):
+        return origin
+    if issubclass(origin,_MAPPINGS):
+        return _mapping(origin,params[0],params[1] if len(params) > 1 else None)
+    return _collection(origin,params[0])
+
+def _predicate(check):
+    """
+    Private method. Don't use directly.
+    `check` as a function taking a value and returning whether it matches
+    """
+    if check is None:
+        return lambda v: True
+    if isinstance(check,(type,tuple)):
+        return lambda v: isinstance(v,check)
+    return check
+
+def _collection(origin,elem):
+    stable = _immutable(origin) and _is_stable(elem)
+    elem = _predicate(elem)
+    def check(v):
+        return isinstance(v,origin) and all(map(elem,_elements(v)))
+    return _memoized(origin,check) if stable else check
+
+def _mapping(origin,key,value):
+    stable = _immutable(origin) and _is_stable(key) and _is_stable(value)
+    key, value = _predicate(key), _predicate(value)
+    def check(v):
+        return isinstance(v,origin) and all(key(k) and value(x) for k,x in _elements(v.items()))
+    return _memoized(origin,check) if stable else check
+
+def _fixed_tuple(params):
+    stable = all(_is_stable(p) for p in params)
+    params = [_predicate(p) for p in params]
+    n = len(params)
+    def check(v):
+        return isinstance(v,tuple) and len(v) == n and all(p(x) for p,x in zip(params,v))
+    return _stable(check) if stable else check
+
+# Compiled checks whose result for a value can't change while it is alive
+_stable_checks = weakref.WeakSet()
+
+def _stable(check):
+    """
+    Private method. Don't use directly.
+    Flag `check` as stable, see `_is_stable`
+    """
+    _stable_checks.add(check)
+    return check
+
+def _is_stable(check) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether the result of the compiled `check` for a value can't change while the value is alive,
+    so it only depends on the types and contents of immutable containers
+    """
+    return check is None or check is callable or isinstance(check,(type,tuple)) or check in _stable_checks
+
+def _immutable(origin) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether instances of `origin` can't have their elements changed
+    """
+    if issubclass(origin,(tuple,frozenset)):
+        return True
+    # Frozen dataclasses
+    params = getattr(origin,'__dataclass_params__',None)
+    return bool(getattr(params,'frozen',False))
+
+def _memoized(origin,check):
+    """
+    Private method. Don't use directly.
+    Remember immutable containers of class `origin` which passed the deep `check`, see `set_container_checks`
+    """
+    def memoized(v):
+        if not isinstance(v,origin):
+            return False
+        settings = _CONTAINERS
+        n = len(v)
+        if not settings.cache or (n if settings.strategy is _FULL else min(n,settings.count)) < _MEMO_MIN:
+            return check(v)
+        # The check is part of the key so it stays alive, and its id isn't reused, while remembered
+        key = (memoized,id(v))
+        held = _memo.get(key)
+        if held is v or (type(held) is weakref.ref and held() is v):
+            return True
+        if not check(v):
+            return False
+        try:
+            _memo[key] = weakref.ref(v)
+        except TypeError:
+            _memo[key] = v
+        while len(_memo) > settings.cache:
+            try:
+                del _memo[next(iter(_memo))]
+            except (KeyError,RuntimeError,StopIteration):
+                # Evicted concurrently
+                break
+        return True
+    return _stable(memoized)
+
+def _erase(annotation):
+    """
+    Private method. Don't use directly.
+    A class which every value matching `annotation` is an instance of, or None if there isn't one
+    """
+    if _is_class(annotation):
+        return annotation
+    if hasattr(annotation,'__metadata__'):
+        return _erase(annotation.__origin__)
+    origin = _origin(annotation)
+    if isinstance(origin,type) and _union_args(annotation) is None:
+        return origin
+    return None
@@ -1,8 +1,9 @@
-from .type_check import TypeCheckError, type_check
+from . import stats as _stats
+from .type_check import TypeCheckError, type_check, _COMPILATION, _LAZY, _matcher, _resolver, _compile_match, _compiled, _when_needed, _is_coroutine, _mark_coroutine, _lock
 from .types import Function
 from typing import Type
 from functools import wraps
-from inspect import isfunction
+from inspect import isfunction, signature
 
 def inherit(*args,errors=(NotImplementedError)):
     """A decorator which automatically wraps the underlying function and instead calls a parent class
@@ -46,34 +47,186 @@ def inherit(*args,errors=(NotImplementedError)):
         Handle annotations
     """
     bases = []
-    funcs = []
     wrapped = []
+    # The decorated method, as found in the namespace of the class which defined it
+    decorated = []
+    # Classes which defined the method, bound when they were created
+    owners = set()
+    # Parent implementations to try, as (base, function, matcher, resolver), by class of the instance.
+    # Entries are only added, so are read without locking
+    tables = {}
+    # Whether the decorated method is a coroutine function, so the parents' are too
+    asynchronous = False
+
+    def parents(owner):
+        # Classes whose implementations a method defined in `owner` inherits
+        name = wrapped[0].__name__
+        return [b for b in (bases or getattr(owner,'__bases__',())) if hasattr(b,name)]
+
+    def table(owner):
+        # Parent implementations for a method defined in `owner`
+        name = wrapped[0].__name__
+        res = []
+        for b in parents(owner):
+            f = _compiled(type_check(getattr(b,name)))
+            res.append((b,f,_matcher(f),_resolver(f)))
+        return tuple(res)
+
+    def bind(owner):
+        # Called by `TypedMeta` when the class defining the method is created. Its table is built
+        # now, so the first call doesn't pay for it, unless compiling lazily
+        owners.add(owner)
+        if _COMPILATION.mode is not _LAZY:
+            with _lock:
+                if owner not in tables:
+                    tables[owner] = table(owner)
+
+    def resolve(args):
+        cls = args[0].__class__ if args else None
+        try:
+            return tables[cls]
+        except KeyError:
+            pass
+        # The method was defined by the nearest class in the MRO of the instance which has it,
+        # not necessarily the class of the instance
+        name = wrapped[0].__name__
+        owner = next((c for c in getattr(cls,'__mro__',()) if c in owners or vars(c).get(name) is decorated[0]),cls)
+        with _lock:
+            # Built once, however many threads make the first call at the same time
+            if owner not in tables:
+                tables[owner] = table(owner)
+            res = tables[cls] = tables[owner]
+        return res
 
     # Define the wrapper for the function
     def wrapper(*args,**kwargs):
-        if len(bases)==0:
-            # We don't have any bases, extract from the object
-            bases.extend(args[0].__class__.__bases__)
-            # funcs.extend([getattr(b,wrapped[0].__name__) for b in bases if hasattr(b,wrapped[0].__name__)])
+        if _stats._enabled:
+            return instrumented(args,kwargs)
+        funcs = resolve(args)
+        if asynchronous:
+            return launch(funcs,args,kwargs)
+        if len(funcs) == 1:
+            # Straight to the parent implementation, which checks its own arguments
+            try:
+                return funcs[0][1](*args,**kwargs)
+            except errors:
+                pass
+        else:
+            for b,f,match,_ in funcs:
+                # Skip methods which won't accept the arguments without raising
+                if not match(*args,**kwargs):
+                    continue
+                try:
+                    return f(*args,**kwargs)
+                except errors:
+                    pass
+        raise TypeCheckError("could not find valid @inherit method for "+wrapped[0].__qualname__)
+
+    def launch(funcs,args,kwargs,rec=None):
+        # The wrapper for coroutine functions. Parents are selected now, but coroutines only raise once
+        # awaited, so falling back to the next parent has to wait until then
+        if len(funcs) == 1 and rec is None:
+            try:
+                return funcs[0][1](*args,**kwargs)
+            except errors:
+                raise TypeCheckError("could not find valid @inherit method for "+wrapped[0].__qualname__) from None
+        matched = []
+        for b,f,match,_ in funcs:
+            if match(*args,**kwargs):
+                matched.append((b,f))
+            elif rec is not None:
+                rec.rejected += 1
+        if len(matched) == 1 and rec is None:
+            return matched[0][1](*args,**kwargs)
+        if not matched:
+            if rec is not None:
+                rec.errors += 1
+            raise TypeCheckError("could not find valid @inherit method for "+wrapped[0].__qualname__)
+        return awaiting(matched,args,kwargs,rec)
 
-        if len(funcs)==0:
-            # Extract functions from the bases
-            funcs.extend([type_check(getattr(b,wrapped[0].__name__)) for b in bases if hasattr(b,wrapped[0].__name__)])
+    async def awaiting(matched,args,kwargs,rec):
+        for b,f in matched:
+            begin = _stats._clock()
+            try:
+                res = await f(*args,**kwargs)
+            except errors:
+                if rec is not None:
+                    rec.rejected += 1
+                continue
+            finally:
+                if rec is not None:
+                    rec.exec_ns += _stats._clock()-begin
+            if rec is not None:
+                rec.selected[b.__qualname__] += 1
+            return res
+        if rec is not None:
+            rec.errors += 1
+        raise TypeCheckError("could not find valid @inherit method for "+wrapped[0].__qualname__)
 
-        for f in funcs:
+    def instrumented(args,kwargs):
+        # The wrapper, recording statistics
+        rec = _stats._record('inherit',_stats._name(wrapped[0]))
+        rec.calls += 1
+        if asynchronous:
+            begin = _stats._clock()
             try:
-                return f(*args,**kwargs)
+                return launch(resolve(args),args,kwargs,rec)
+            finally:
+                rec.check_ns += _stats._clock()-begin
+        for b,f,match,_ in resolve(args):
+            start = _stats._clock()
+            matched = match(*args,**kwargs)
+            rec.check_ns += _stats._clock()-start
+            if not matched:
+                rec.rejected += 1
+                continue
+            start = _stats._clock()
+            try:
+                res = f(*args,**kwargs)
             except errors:
-                pass
+                rec.rejected += 1
+                continue
+            finally:
+                rec.exec_ns += _stats._clock()-start
+            rec.selected[b.__qualname__] += 1
+            return res
+        rec.errors += 1
         raise TypeCheckError("could not find valid @inherit method for "+wrapped[0].__qualname__)
 
-    wrapper.__inherit__ = True
+    def match(*args,**kwargs):
+        return any(m(*args,**kwargs) for b,f,m,_ in resolve(args))
+
+    def route(*args,**kwargs):
+        # With a single parent, the call can go straight to whatever handles it there
+        funcs = resolve(args)
+        if len(funcs) == 1:
+            return funcs[0][3](*args,**kwargs)
+        return wrapper if match(*args,**kwargs) else None
+
+    # Truthy, and called with the owning class by `TypedMeta`
+    wrapper.__inherit__ = bind
+    wrapper.__parents__ = parents
+    wrapper.__match__ = match
+    wrapper.__resolve__ = route
 
     # Create a decorator for the function
     def decorator(func: Function):
+        nonlocal asynchronous
+        asynchronous = _is_coroutine(func)
         res = wraps(func)(wrapper)
         wrapped.append(func)
-        return type_check(res)
+        if asynchronous:
+            _mark_coroutine(res)
+        if func.__annotations__:
+            # Check the annotations of the inheriting method before the parent's
+            res = type_check(res)
+        else:
+            # Nothing to check, so call the parent directly. `_returns` is passed through to it
+            res.__typed__ = True
+            res.__match__ = _when_needed(lambda: _compile_match(signature(func),match))
+            res.__resolve__ = _when_needed(lambda: _compile_match(signature(func),route,leaf=res))
+        decorated.append(res)
+        return res
 
     if len(args)==1 and isfunction(args[0]):
         # If it's being called to decorate a function
@@ -0,0 +1,155 @@
+"""
+Opt-in runtime statistics for typed callables.
+
+When enabled, `@type_check` functions, overloaded methods, `OverloadFunction`, `@inherit` methods and
+`cast` record how often they are called, the time spent checking arguments versus executing, how many
+candidates were rejected before one was selected, which candidate was selected, and which `cast` path
+was taken. When disabled (the default) the only cost is checking a flag on each call.
+
+Example:
+    >>> from mydipy import stats
+    >>> stats.enable()
+    >>> ... # run some code
+    >>> print(stats.to_prometheus())
+    >>> stats.reset()
+"""
+from collections import Counter
+try:
+    from time import perf_counter_ns as _clock
+except ImportError:
+    # Python < 3.7
+    from time import perf_counter
+
+    def _clock() -> int:
+        return int(perf_counter()*1e9)
+
+__all__ = ["enable","disable","is_enabled","snapshot","reset","to_json","to_prometheus"]
+
+# Checked by instrumented callables on each call
+_enabled = False
+
+# Records by (kind, name)
+_records = {}
+
+class _Record:
+    """
+    Private class. Don't use directly.
+    Counters for a single callable
+    """
+    __slots__ = ('calls','errors','check_ns','exec_ns','rejected','misses','selected','paths')
+
+    def __init__(self):
+        self.calls = 0
+        # Calls rejected for their types
+        self.errors = 0
+        self.check_ns = 0
+        self.exec_ns = 0
+        # Candidates tried and rejected before one was selected
+        self.rejected = 0
+        # Dispatch cache misses
+        self.misses = 0
+        # Count of the candidates selected
+        self.selected = Counter()
+        # Count of the `cast` paths taken
+        self.paths = Counter()
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'check_seconds': self.check_ns/1e9,
+            'exec_seconds': self.exec_ns/1e9,
+            'rejected': self.rejected,
+            'misses': self.misses,
+            'selected': dict(self.selected),
+            'paths': dict(self.paths),
+        }
+
+def _record(kind, name) -> _Record:
+    """
+    Private function. Don't use directly.
+    The record of callable `name` of `kind`, created if needed
+    """
+    try:
+        return _records[kind,name]
+    except KeyError:
+        return _records.setdefault((kind,name),_Record())
+
+async def _timed(coro, rec):
+    """
+    Private function. Don't use directly.
+    Await `coro`, counting the time until it finishes as executing in `rec`
+    """
+    start = _clock()
+    try:
+        return await coro
+    finally:
+        rec.exec_ns += _clock()-start
+
+def _name(func) -> str:
+    """
+    Private function. Don't use directly.
+    Name used to record `func`
+    """
+    return '{}.{}'.format(getattr(func,'__module__',None),getattr(func,'__qualname__',repr(func)))
+
+def enable():
+    """Start recording statistics"""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Stop recording statistics. Statistics recorded so far are kept"""
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """Discard all recorded statistics"""
+    _records.clear()
+
+def snapshot() -> dict:
+    """
+    The statistics recorded so far.
+
+    Returns:
+        A dictionary of kind (`type_check`, `overload`, `inherit` or `cast`) to a dictionary of
+        callable name to its statistics. For `cast`, the name is `<source type>-><target type>`.
+    """
+    res = {}
+    for (kind,name),rec in list(_records.items()):
+        res.setdefault(kind,{})[name] = rec.as_dict()
+    return res
+
+def to_json(**kwargs) -> str:
+    """The `snapshot` as JSON. Keyword arguments are passed to `json.dumps`"""
+    import json
+    return json.dumps(snapshot(),**kwargs)
+
+def _label(value) -> str:
+    return str(value).replace('\\','\\\\').replace('"','\\"').replace('\n','\\n')
+
+def to_prometheus(prefix='mydipy') -> str:
+    """The `snapshot` in the Prometheus text exposition format"""
+    metrics = [
+        ('calls_total', 'Calls of typed callables', lambda r: [({},r.calls)]),
+        ('errors_total', 'Calls rejected for their types', lambda r: [({},r.errors)]),
+        ('check_seconds_total', 'Time spent checking arguments and selecting candidates', lambda r: [({},r.check_ns/1e9)]),
+        ('exec_seconds_total', 'Time spent executing the selected implementation', lambda r: [({},r.exec_ns/1e9)]),
+        ('rejected_total', 'Candidates rejected before one was selected', lambda r: [({},r.rejected)]),
+        ('cache_misses_total', 'Dispatch cache misses', lambda r: [({},r.misses)]),
+        ('selected_total', 'Times each candidate was selected', lambda r: [({'candidate':k},v) for k,v in r.selected.items()]),
+        ('cast_paths_total', 'Times each cast path was taken', lambda r: [({'path':k},v) for k,v in r.paths.items()]),
+    ]
+    records = sorted(_records.items())
+    lines = []
+    for metric,doc,values in metrics:
+        lines.append('# HELP {}_{} {}'.format(prefix,metric,doc))
+        lines.append('# TYPE {}_{} counter'.format(prefix,metric))
+        for (kind,name),rec in records:
+            for labels,value in values(rec):
+                labels = dict(kind=kind,name=name,**labels)
+                lines.append('{}_{}{{{}}} {}'.format(prefix,metric,','.join('{}="{}"'.format(k,_label(v)) for k,v in labels.items()),value))
+    return '\n'.join(lines)+'\n'
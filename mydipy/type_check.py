@@ -1,14 +1,189 @@
+import atexit
+import marshal
+import os
+import sys
+import threading
+from abc import ABCMeta
 from functools import wraps
 from itertools import chain
-from typing import Any, Type
+from typing import Any, Type, Coroutine
 from collections import defaultdict as ddict
 
-from inspect import Signature, signature, isclass, isfunction, \
+from . import stats as _stats
+from .generic import _compile_annotation, _erase, _union_args
+
+from inspect import Signature, signature, isclass, isfunction, iscoroutinefunction, unwrap, \
     _VAR_KEYWORD,_KEYWORD_ONLY,_VAR_POSITIONAL,_POSITIONAL_ONLY,_POSITIONAL_OR_KEYWORD,_empty
+try:
+    from inspect import markcoroutinefunction
+except ImportError:
+    # Python < 3.12
+    markcoroutinefunction = None
 
 class TypeCheckError(TypeError,NotImplementedError): pass
 
-def type_check(obj):
+def _random():
+    # `random` is slow to import and only needed when sampling randomly, so it replaces this on first use
+    global _random
+    from random import random as _random
+    return _random()
+
+# Enforcement modes
+_FULL, _SAMPLED, _BOUNDARY, _OFF = 'full', 'sampled', 'boundary', 'off'
+_MODES = {m: m for m in (_FULL, _SAMPLED, _BOUNDARY, _OFF)}
+
+class _Depth(threading.local):
+    """Private class. Number of `boundary` mode typed calls in progress on this thread"""
+    depth = 0
+
+_boundary = _Depth()
+
+# Held while building or changing state shared by typed callables, such as dispatch trees and lazily
+# compiled wrappers, so it is built once. Built state is read without it
+_lock = threading.RLock()
+
+class _Policy:
+    """
+    Private class. Don't use directly.
+
+    Enforcement settings of a single typed function, or the process-wide default.
+    A function's `mode` of None defers to the process-wide default.
+    """
+    __slots__ = ('mode','every','random','_count')
+
+    def __init__(self,mode=None,every=1,random=False):
+        self.set(mode,every,random)
+
+    def set(self,mode,every=1,random=False):
+        if mode is not None and mode not in _MODES:
+            raise ValueError('invalid enforcement mode {mode!r}, expected one of {modes!r}'.format(mode=mode,modes=tuple(_MODES)))
+        if not isinstance(every,int) or every < 1:
+            raise ValueError('enforcement must be sampled every one or more calls, not {every!r}'.format(every=every))
+        self.mode = None if mode is None else _MODES[mode]
+        self.every = every
+        self.random = random
+        self._count = 0
+
+    def enforce(self,mode) -> bool:
+        """Whether this call should be checked in `sampled` or `boundary` mode"""
+        if mode is _BOUNDARY:
+            return not _boundary.depth
+        settings = self if self.mode is not None else _ENFORCEMENT
+        if settings.random:
+            return _random()*settings.every < 1
+        # Check the first of every `every` calls
+        count = self._count
+        self._count = count+1 if count+1 < settings.every else 0
+        return count == 0
+
+# Process-wide default
+_ENFORCEMENT = _Policy(_FULL)
+
+def set_enforcement(mode=_FULL, every=1, random=False, func=None):
+    """
+    Choose how `@type_check` wrappers enforce types, process-wide or for a single function.
+
+    Modes:
+        * `'full'`: Check every call (the default)
+        * `'sampled'`: Check one call in `every`, either the first of each `every` calls or, if `random`
+          is True, each call with probability `1/every`
+        * `'boundary'`: Only check calls which are not made from within another typed call,
+          i.e. where untyped code calls into typed code. Calls made while a coroutine runs are
+          checked, as it runs once awaited rather than within the typed call which created it
+        * `'off'`: Don't check calls, the wrappers just pass through
+
+    Overload dispatch still selects implementations by the types of the arguments (and `_returns`)
+    in every mode. Only the checking of the call to the selected implementation is affected.
+
+    The process-wide mode may also be given by the `MYDIPY_ENFORCEMENT` environment variable as
+    `mode`, `mode:every` or `mode:every:random`, e.g. `MYDIPY_ENFORCEMENT=sampled:100`.
+
+    Args:
+        mode: One of the modes above. With `func`, None reverts the function to the process-wide mode
+        every: Check one call in this many when `sampled`
+        random: Whether to sample randomly rather than deterministically
+        func: A `@type_check` wrapped function to configure, rather than the process-wide default
+
+    Raises:
+        ValueError: If the mode or sampling interval is invalid
+        TypeError: If `func` is not a `@type_check` wrapped function
+
+    Example:
+        >>> set_enforcement('sampled', every=100)
+        >>> set_enforcement('full', func=critical_function)
+    """
+    if func is None:
+        if mode is None:
+            raise ValueError('the process-wide enforcement mode cannot be None')
+        _ENFORCEMENT.set(mode,every,random)
+    elif hasattr(func,'__enforcement__'):
+        func.__enforcement__.set(mode,every,random)
+    else:
+        raise TypeError('{func!r} is not a @type_check function'.format(func=func))
+
+def get_enforcement(func=None) -> str:
+    """
+    The enforcement mode of `func` if it overrides the process-wide mode, otherwise the process-wide mode
+    """
+    policy = getattr(func,'__enforcement__',_ENFORCEMENT)
+    return policy.mode or _ENFORCEMENT.mode
+
+# Compilation modes
+_EAGER, _LAZY = 'eager', 'lazy'
+_COMPILATIONS = {m: m for m in (_EAGER, _LAZY)}
+
+class _Compilation:
+    """
+    Private class. Don't use directly.
+    Process-wide compilation setting
+    """
+    __slots__ = ('mode','cache')
+
+    def __init__(self,mode,cache):
+        self.mode = mode
+        # Whether generated checks are kept on disk, see `_Checkers`
+        self.cache = cache
+
+_COMPILATION = _Compilation(_EAGER,True)
+
+def set_compilation(mode=_EAGER, cache=True):
+    """
+    Choose when `@type_check` wrappers analyse the signatures of functions and compile their checks.
+
+    Modes:
+        * `'eager'`: When the function is decorated, or its class is created (the default)
+        * `'lazy'`: When the function is first called, so methods which are never called cost
+          (almost) nothing. Direct calls then go through a stand-in wrapper, one more call deep,
+          while calls of overloaded methods go straight to the compiled overload
+
+    The mode applies to functions decorated after it is set, so set it before importing the modules
+    to speed up. It may also be given by the `MYDIPY_COMPILATION` environment variable,
+    e.g. `MYDIPY_COMPILATION=lazy`.
+
+    Compiling the checks of a function is most of the cost of analysing it. With `cache`, the
+    compiled checks of the functions of each module are saved next to its bytecode when the
+    process exits (e.g. `__pycache__/module.cpython-311.mydipy`), so other processes importing
+    the module load them rather than compiling them again. Like bytecode, they are ignored once
+    the module's source changes, and aren't saved if `sys.dont_write_bytecode` is set
+    (e.g. by `PYTHONDONTWRITEBYTECODE`).
+
+    Args:
+        mode: One of the modes above
+        cache: Whether to load and save compiled checks
+
+    Raises:
+        ValueError: If the mode is invalid
+    """
+    if mode not in _COMPILATIONS:
+        raise ValueError('invalid compilation mode {mode!r}, expected one of {modes!r}'.format(mode=mode,modes=tuple(_COMPILATIONS)))
+    _COMPILATION.mode = _COMPILATIONS[mode]
+    _COMPILATION.cache = bool(cache)
+
+def get_compilation() -> str:
+    """The compilation mode, see `set_compilation`"""
+    return _COMPILATION.mode
+
+def type_check(obj=None, *, enforce=None, every=1, random=False):
     """
     A decorator which wraps a function or class to enforce type checking.
     Type checking is matched against typing annotations in Python 3 as defined by
@@ -47,7 +222,13 @@ def type_check(obj):
         single return types whenever possible.
 
         Functions/methods used with `@type_check` should not have any parameters named `_returns`.
+
+        How calls are checked can be chosen process-wide or per function with `set_enforcement`.
+        The per-function settings may also be given when decorating, e.g. `@type_check(enforce='sampled', every=10)`.
     """
+    if obj is None:
+        # Used as `@type_check(...)` with enforcement settings
+        return lambda obj: type_check(obj,enforce=enforce,every=every,random=random)
 
     # We've already defined this object's typing
     if hasattr(obj,'__typed__'):
@@ -55,54 +236,258 @@ def type_check(obj):
 
     # If it's a function
     elif isfunction(obj):
-        # If there aren't any annotations, just return
-        if not getattr(obj,'__annotations__',{}):
-            @wraps(obj)
-            def filters(*args,**kwargs):
-                kwargs.pop("_returns",None)
-                try:
-                    return obj(*args,**kwargs)
-                except TypeError:
-                    raise TypeCheckError ('Invalid types for calling function')
-            filters.__typed__=True
-
-            return filters
-
-        # Function will need a signature
-        obj.__annotations__['_returns']=Type
-        objsig=signature(obj)
-
-        # Create the wrapper function which includes the `_returns` argument
-        @wraps(obj)
-        def wrapper(*args,**kwargs):
-            # See if we're demanding a return type
-            returns = kwargs.pop("_returns", Any)
-            # Check the arguments to parameters. Raises TypeCheckError if wrong
-            _bind_check(objsig, args, kwargs.copy(), returns)
-
-            if getattr(obj,'__typed__',False) or getattr(obj,'__inherit__',False):
-                kwargs['_returns']=returns
-
-            # Eval if we make it here
-            return obj(*args,**kwargs)
-        wrapper.__typed__=True
-
-        # Return the wrapped function
-        return wrapper
+        # Enforcement settings of this function
+        policy=_Policy(enforce,every,random)
+        if _COMPILATION.mode is _LAZY:
+            return _deferred(obj,policy)
+        return _wrap_function(obj,policy)
 
     elif isclass(obj):
         # Need to iterate through each method in the class
         for k,v in obj.__dict__.items():
-            try:
-                setattr(obj,k,type_check(v))
-            except TypeError:
-                pass
+            if isfunction(v) or isclass(v):
+                setattr(obj,k,type_check(v,enforce=enforce,every=every,random=random))
         # Mark class as typed and return
         obj.__typed__=True
         return obj
     else:
         raise TypeError('@type_check can only be applied to functions or classes')
 
+def _is_coroutine(func) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether calling `func` returns a coroutine, as it is (or wraps) an `async def` function
+    """
+    try:
+        return iscoroutinefunction(func) or iscoroutinefunction(unwrap(func))
+    except ValueError:
+        # Wrappers wrapping themselves
+        return False
+
+def _mark_coroutine(func, flag=True):
+    """
+    Private method. Don't use directly.
+
+    Flag the wrapper `func` as a coroutine function, or not, so `inspect.iscoroutinefunction` (or
+    `asyncio.iscoroutinefunction` before Python 3.12) tells callers that calling it returns a coroutine.
+    Wrappers return the coroutine of the function they wrap rather than being `async def` functions
+    themselves, so arguments are checked when the coroutine is created and it isn't wrapped in another.
+    """
+    if markcoroutinefunction is not None:
+        if flag:
+            markcoroutinefunction(func)
+        else:
+            vars(func).pop('_is_coroutine_marker',None)
+    elif flag:
+        from asyncio import coroutines
+        func._is_coroutine = coroutines._is_coroutine
+    else:
+        vars(func).pop('_is_coroutine',None)
+    return func
+
+def _return_annotation(sig, func):
+    """
+    Private method. Don't use directly.
+
+    The annotation `_returns` is matched against for `func` with signature `sig`. Calling a coroutine
+    function returns a coroutine, so it may be asked for the awaited type or for an awaitable of it
+    (e.g. `_returns=Awaitable[int]`, which plain functions returning an `int` don't match). These
+    alternatives are given as a tuple, see `_returns_match`
+    """
+    ret = sig.return_annotation
+    if ret is _empty or ret is Any or not _is_coroutine(func):
+        return ret
+    return (ret,Coroutine[Any,Any,ret])
+
+def _wrap_function(obj, policy):
+    """
+    Private method. Don't use directly.
+    The `@type_check` wrapper of the function `obj`, with enforcement settings `policy`
+    """
+    # If there aren't any annotations, just return
+    if not getattr(obj,'__annotations__',{}):
+        @wraps(obj)
+        def filters(*args,**kwargs):
+            kwargs.pop("_returns",None)
+            try:
+                return obj(*args,**kwargs)
+            except TypeError:
+                raise TypeCheckError ('Invalid types for calling function')
+        filters.__typed__=True
+        if _is_coroutine(obj):
+            _mark_coroutine(filters)
+        filters.__match__=_compile_match(signature(obj),_matcher(obj),False)
+        filters.__resolve__=_compile_match(signature(obj),_matcher(obj),False,leaf=filters)
+
+        return filters
+
+    # Function will need a signature
+    obj.__annotations__['_returns']=Type
+    objsig=signature(obj)
+
+    # Compile a checker specialized to this signature once, rather than interpreting it every call
+    check=_compile_check(objsig,obj)
+    sig=objsig
+    ret=_return_annotation(objsig,obj)
+    if ret is not objsig.return_annotation:
+        # Coroutine functions may be asked for the awaited type or an awaitable of it
+        objsig=objsig.replace(return_annotation=ret)
+    # Pass `_returns` through to wrapped functions which can make use of it
+    forward=getattr(obj,'__typed__',False) or getattr(obj,'__inherit__',False)
+
+    def validate(args,kwargs,_returns):
+        # Check the arguments to parameters.
+        try:
+            valid = check(*args,**kwargs)
+        except TypeError:
+            # Python itself could not bind the arguments
+            valid = False
+
+        if not valid or (_returns is not Any and not _returns_match(ret,_returns)):
+            # Slow path only on failure: raises a descriptive TypeCheckError
+            _bind_check(objsig, args, kwargs.copy(), _returns)
+
+    def execute(args,kwargs,_returns,mode):
+        if mode is not _BOUNDARY:
+            return obj(*args,_returns=_returns,**kwargs) if forward else obj(*args,**kwargs)
+        # Calls made from inside this one aren't at the boundary
+        _boundary.depth += 1
+        try:
+            return obj(*args,_returns=_returns,**kwargs) if forward else obj(*args,**kwargs)
+        finally:
+            _boundary.depth -= 1
+
+    name=_stats._name(obj)
+    asynchronous=_is_coroutine(obj)
+    def instrumented(args,kwargs,_returns):
+        # The wrapper, recording statistics
+        rec = _stats._record('type_check',name)
+        rec.calls += 1
+        mode = policy.mode or _ENFORCEMENT.mode
+        start = _stats._clock()
+        if mode is _FULL or (mode is not _OFF and policy.enforce(mode)):
+            try:
+                validate(args,kwargs,_returns)
+            except TypeCheckError:
+                rec.errors += 1
+                raise
+            finally:
+                rec.check_ns += _stats._clock()-start
+        start = _stats._clock()
+        try:
+            res = execute(args,kwargs,_returns,mode)
+        finally:
+            rec.exec_ns += _stats._clock()-start
+        # Coroutines run once awaited
+        return _stats._timed(res,rec) if asynchronous else res
+
+    # Create the wrapper function which includes the `_returns` argument
+    @wraps(obj)
+    def wrapper(*args,_returns=Any,**kwargs):
+        if _stats._enabled:
+            return instrumented(args,kwargs,_returns)
+
+        mode = policy.mode or _ENFORCEMENT.mode
+        if mode is _FULL or (mode is not _OFF and policy.enforce(mode)):
+            # Check the arguments to parameters. Inlined from `validate` as this is the hot path
+            try:
+                valid = check(*args,**kwargs)
+            except TypeError:
+                # Python itself could not bind the arguments
+                valid = False
+
+            if not valid or (_returns is not Any and not _returns_match(ret,_returns)):
+                # Slow path only on failure: raises a descriptive TypeCheckError
+                _bind_check(objsig, args, kwargs.copy(), _returns)
+
+        if mode is _BOUNDARY:
+            return execute(args,kwargs,_returns,mode)
+
+        if forward:
+            return obj(*args,_returns=_returns,**kwargs)
+
+        # Eval if we make it here
+        return obj(*args,**kwargs)
+
+    def unchecked(*args,_returns=Any,**kwargs):
+        # The wrapper once `__resolve__` has checked the arguments
+        mode = policy.mode or _ENFORCEMENT.mode
+        if mode is _BOUNDARY:
+            return execute(args,kwargs,_returns,mode)
+        return obj(*args,**kwargs)
+
+    wrapper.__typed__=True
+    # The signature of `obj`, which `signature(wrapper)` would otherwise work out again from it
+    wrapper.__signature__=sig
+    wrapper.__match__=_compile_match(objsig,_matcher(obj),forward,check)
+    wrapper.__resolve__=_compile_match(objsig,_resolver(obj) if forward else _matcher(obj),forward,check,unchecked)
+    wrapper.__enforcement__=policy
+    if asynchronous:
+        _mark_coroutine(wrapper)
+
+    # Return the wrapped function
+    return wrapper
+
+
+def _deferred(obj, policy):
+    """
+    Private method. Don't use directly.
+
+    Stand-in for the `@type_check` wrapper of the function `obj`, which analyses its signature and
+    compiles its checks when it is first called or matched, see `set_compilation`
+    """
+    compiled = None
+
+    def compile():
+        nonlocal compiled
+        if compiled is None:
+            with _lock:
+                if compiled is None:
+                    res = _wrap_function(obj,policy)
+                    # Later lookups go straight to the compiled methods
+                    wrapper.__match__ = res.__match__
+                    wrapper.__resolve__ = res.__resolve__
+                    compiled = res
+        return compiled
+
+    @wraps(obj)
+    def wrapper(*args,**kwargs):
+        return (compiled or compile())(*args,**kwargs)
+
+    if getattr(obj,'__annotations__',{}):
+        wrapper.__enforcement__=policy
+    wrapper.__typed__=True
+    wrapper.__match__=lambda *args,**kwargs: compile().__match__(*args,**kwargs)
+    wrapper.__resolve__=lambda *args,**kwargs: compile().__resolve__(*args,**kwargs)
+    wrapper.__compile__=compile
+    if _is_coroutine(obj):
+        _mark_coroutine(wrapper)
+    return wrapper
+
+def _compiled(func):
+    """
+    Private method. Don't use directly.
+    `func`, or the wrapper it stands in for if its compilation was deferred, compiled now
+    """
+    compile = getattr(func,'__compile__',None)
+    return func if compile is None else compile()
+
+def _when_needed(build):
+    """
+    Private method. Don't use directly.
+    The function `build()` returns or, when compiling lazily, a function building it on its first call
+    """
+    if _COMPILATION.mode is not _LAZY:
+        return build()
+    built = []
+    def call(*args,**kwargs):
+        if not built:
+            with _lock:
+                if not built:
+                    built.append(build())
+        return built[0](*args,**kwargs)
+    return call
+
 def no_type_check(obj):
     """
     A decorator which explicitly marks a class or method to NOT be type checked.
@@ -155,6 +540,79 @@ def no_type_check(obj):
     return obj
 
 
+def _match_any(*args,**kwargs) -> bool:
+    """
+    Private method. Don't use directly.
+    `__match__` of callables which don't have one: accept everything and let the call decide
+    """
+    return True
+
+def _matcher(func):
+    """
+    Private method. Don't use directly.
+
+    Typed callables have a `__match__` method, taking the same arguments as the callable itself
+    (including `_returns`), which returns whether a call with those arguments would be accepted.
+    Unlike calling, it never raises, so it can be used to select between candidates.
+
+    Returns:
+        The `__match__` method of `func`, or one accepting everything if it has none
+    """
+    return getattr(func,'__match__',_match_any)
+
+def _resolver(func):
+    """
+    Private method. Don't use directly.
+
+    Typed callables also have a `__resolve__` method which, like `__match__`, checks the arguments
+    without raising. Instead of True it returns the innermost callable which will handle the call,
+    taking the same arguments, with every check on the way already done. Calling that directly
+    means layers of wrappers (overloads of `@inherit` methods of overloads...) check a call once.
+
+    Returns:
+        The `__resolve__` method of `func`, or one built from its `__match__` returning `func` itself
+    """
+    resolve = getattr(func,'__resolve__',None)
+    if resolve is not None:
+        return resolve
+    match = _matcher(func)
+    return lambda *args,**kwargs: func if match(*args,**kwargs) else None
+
+def _compile_match(sig, inner=_match_any, forward=True, check=None, leaf=None):
+    """
+    Private method. Don't use directly.
+
+    Build the `__match__` method for a wrapper of a function with signature `sig`, which
+    delegates to `inner` (the `__match__` of the wrapped callable) once its own checks pass.
+    If `forward` is False the wrapped callable isn't passed `_returns`.
+
+    Given the callable to `leaf` to once checks pass, build the `__resolve__` method instead. If
+    `forward`, `inner` is the `__resolve__` of the wrapped callable, which finds the leaf.
+    """
+    if check is None:
+        check = _compile_check(sig)
+    ret = sig.return_annotation
+    accept = True if leaf is None else leaf
+    reject = False if leaf is None else None
+
+    def match(*args,_returns=Any,**kwargs) -> bool:
+        try:
+            if not check(*args,**kwargs):
+                return reject
+        except TypeError:
+            # Python itself could not bind the arguments
+            return reject
+        if _returns is not Any and not _returns_match(ret,_returns):
+            return reject
+        if forward and leaf is not None:
+            return inner(*args,_returns=_returns,**kwargs)
+        if inner is _match_any:
+            return accept
+        if not (inner(*args,_returns=_returns,**kwargs) if forward else inner(*args,**kwargs)):
+            return reject
+        return accept
+    return match
+
 def _bind_check(sig, args, kwargs, return_type = Any) -> None:
     """
     Private method. Don't use directly.
@@ -162,15 +620,7 @@ def _bind_check(sig, args, kwargs, return_type = Any) -> None:
     Raises:
        TypeCheckError: If the args/kwargs cannot be successfully mapped to the function signature sig
     """
-    #print(sig,args,kwargs,return_type)
-    if return_type is Any:
-        pass
-    elif sig.return_annotation is _empty:
-        # Return annotation is unspecified, so this COULD be valid. Try it.
-        pass
-    elif return_type is None and (sig.return_annotation is not None or None not in sig.return_annotation):
-        raise TypeCheckError("function cannot return {ret!r}".format(ret=return_type)) from None
-    elif not issubclass(sig.return_annotation,return_type):
+    if not _returns_match(sig.return_annotation, return_type):
         raise TypeCheckError("function cannot return {ret!r}".format(ret=return_type)) from None
 
     parameters = iter(sig.parameters.values())
@@ -221,16 +671,16 @@ def _bind_check(sig, args, kwargs, return_type = Any) -> None:
                     raise TypeCheckError(
                         'too many positional arguments') from None
 
-                if param.annotation is not _empty and not isinstance(arg_val,param.annotation):
+                if not _isinstance(arg_val,param.annotation):
                     # Check the data type, if specified
                     raise TypeCheckError('type mismatch for argument {arg!r}. Got {val!r}, needed {typ!r}'.format(arg=param.name,val=type(arg_val),typ=str(param.annotation))) from None
 
                 if param.kind == _VAR_POSITIONAL:
                     # We have an '*args'-like argument, let's check if we have a datatype
-                    if param.annotation is not _empty:
+                    if _needs_check(param.annotation):
                         # Check each remaining value against the required type
                         for v in arg_vals:
-                            if not isinstance(v,param.annotation):
+                            if not _isinstance(v,param.annotation):
                                 # Check the data type if specified
                                 raise TypeCheckError('type mismatch for argument {arg!r}. Got {val!r}, needed {typ!r}'.format(arg=param.name,val=type(v),typ=str(param.annotation))) from None
                     break
@@ -268,16 +718,299 @@ def _bind_check(sig, args, kwargs, return_type = Any) -> None:
                 # This should never happen in case of a properly built Signature object (but let's have this check here to ensure correct behaviour just in case)
                 raise TypeCheckError('{arg!r} parameter is positional only, but was passed as a keyword'.format(arg=param.name))
 
-            if param.annotation is not _empty and not isinstance(arg_val,param.annotation):
+            if not _isinstance(arg_val,param.annotation):
                 # Check the data type if specified
                 raise TypeCheckError('type mismatch for argument {arg!r}. Got {val!r}, needed {typ!r}'.format(arg=param.name,val=type(arg_val),typ=str(param.annotation))) from None
 
     if kwargs:
         if kwargs_param is not None:
             # Process our '**kwargs'-like parameter and check datatypes (if any)
-            if kwargs_param.annotation is not _empty:
+            if _needs_check(kwargs_param.annotation):
                 for k,v in kwargs.items():
-                    if not isinstance(v,kwargs_param.annotation):
+                    if not _isinstance(v,kwargs_param.annotation):
                         raise TypeCheckError('type mismatch for argument {arg!r} as **{kwarg!r}. Got {val!r}, needed {typ!r}'.format(arg=k,val=type(v),typ=str(kwargs_param.annotation),kwarg=str(kwargs_param.name))) from None
         else:
-            raise TypeCheckError('got an unexpected keyword argument {arg!r}'.format(arg=next(iter(kwargs))))
\ No newline at end of file
+            raise TypeCheckError('got an unexpected keyword argument {arg!r}'.format(arg=next(iter(kwargs))))
+
+# Results of `_returns_match` by (annotation, return type, definite)
+_returns_matches = {}
+
+# Maximum number of entries of `_returns_matches`
+_RETURNS_MATCHES_SIZE = 4096
+
+def _returns_match(annotation, return_type, definite=False) -> bool:
+    """
+    Private method. Don't use directly.
+
+    Whether a function with return annotation `annotation` may be called with `_returns=return_type`:
+    when it is annotated as returning (a subclass of) that type, or isn't annotated with anything which
+    can be compared to it. With `definite`, only the former. A tuple of annotations matches if any of
+    them does, see `_return_annotation`.
+
+    Results are cached, as this is checked on every call passing `_returns`.
+    """
+    if return_type is Any:
+        return True
+    key = (annotation,return_type,definite)
+    try:
+        return _returns_matches[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable annotations
+        return _match_returns(annotation,return_type,definite)
+    if len(_returns_matches) >= _RETURNS_MATCHES_SIZE:
+        _returns_matches.clear()
+    res = _returns_matches[key] = _match_returns(annotation,return_type,definite)
+    return res
+
+def _match_returns(annotation, return_type, definite) -> bool:
+    """
+    Private method. Don't use directly.
+    `_returns_match`, without caching
+    """
+    if return_type is Any:
+        return True
+    elif annotation is _empty or annotation is Any:
+        # Return annotation is unspecified, so this COULD be valid. Try it.
+        return not definite
+    elif return_type is None:
+        return annotation is None or annotation is type(None)
+
+    if isinstance(annotation,tuple):
+        # Alternative annotations, any of which may be asked for
+        return any(_match_returns(a,return_type,definite) for a in annotation)
+    members = _union_args(annotation)
+    if members is not None:
+        # Every possible return type must be acceptable
+        return all(_match_returns(m,return_type,definite) for m in members)
+    cls, return_cls = _erase(annotation), _erase(return_type)
+    if cls is None or return_cls is None:
+        # Can't tell from the annotations, so this COULD be valid. Try it.
+        return not definite
+    return issubclass(cls,return_cls)
+
+# Compiled annotations by annotation
+_instance_checks = {}
+
+def _instance_check(annotation):
+    """
+    Private method. Don't use directly.
+
+    The check of values against `annotation`: None if anything matches, a class (or tuple of
+    classes) to check with `isinstance`, or otherwise a function returning whether a value matches.
+    Generics such as `List[int]` only check a bounded number of elements, see `set_container_checks`.
+    """
+    if annotation is _empty:
+        return None
+    try:
+        return _instance_checks[annotation]
+    except KeyError:
+        check = _instance_checks[annotation] = _compile_annotation(annotation)
+        return check
+    except TypeError:
+        # Unhashable annotation
+        return _compile_annotation(annotation)
+
+def _isinstance(value, annotation) -> bool:
+    """
+    Private method. Don't use directly.
+    `isinstance` which also understands `typing` annotations
+    """
+    check = _instance_check(annotation)
+    if check is None:
+        return True
+    if isinstance(check,(type,tuple)):
+        return isinstance(value,check)
+    return check(value)
+
+def _needs_check(annotation) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether an annotation restricts anything at all
+    """
+    return _instance_check(annotation) is not None
+
+def _type_determined(annotation) -> bool:
+    """
+    Private method. Don't use directly.
+    Whether `isinstance(val, annotation)` depends only upon `type(val)`, i.e. the annotation is a
+    class (or union of classes) whose metaclass does not customize instance checks
+    """
+    check = annotation if isinstance(annotation,tuple) else _instance_check(annotation)
+    if isinstance(check,tuple):
+        return all(_type_determined(c) for c in check)
+    return isinstance(check,type) and \
+        type(check).__instancecheck__ in (type.__instancecheck__, ABCMeta.__instancecheck__)
+
+# Sentinel used as the default of compiled checkers so untouched defaults aren't checked
+_DEFAULT = object()
+
+def _compile_check(sig, func=None):
+    """
+    Private method. Don't use directly.
+
+    Generate a checker specialized to `sig`. The checker has the same parameter layout as `sig` so that
+    Python itself binds the arguments, leaving only the `isinstance` tests the signature actually needs.
+    Its code is looked up in the checkers of the file defining `func`, if given, see `_checker`.
+
+    Returns:
+        A function which takes the same arguments as `sig` and returns whether their types match.
+        It raises TypeError (as any Python function would) if the arguments cannot be bound.
+    """
+    namespace = {'__mdp_default': _DEFAULT, '__mdp_isinstance': isinstance}
+    params = []
+    checks = []
+    star = False
+    # Index of the last positional-only parameter, after which a `/` is required
+    posonly = max((i for i,p in enumerate(sig.parameters.values()) if p.kind == _POSITIONAL_ONLY), default=None)
+    for i,param in enumerate(sig.parameters.values()):
+        name = param.name
+        typ = '__mdp_t{}'.format(i)
+
+        # Mirror the parameter
+        if param.kind == _VAR_POSITIONAL:
+            params.append('*'+name)
+            star = True
+        elif param.kind == _VAR_KEYWORD:
+            params.append('**'+name)
+        else:
+            if param.kind == _KEYWORD_ONLY and not star:
+                params.append('*')
+                star = True
+            params.append(name if param.default is _empty else name+'=__mdp_default')
+            if i == posonly:
+                params.append('/')
+
+        check = _instance_check(param.annotation)
+        if check is None:
+            continue
+        namespace[typ] = check
+        # Classes are checked with `isinstance`, generics by calling their compiled check
+        test = ('__mdp_isinstance({v},'+typ+')') if isinstance(check,(type,tuple)) else (typ+'({v})')
+
+        # Only check what the signature asks for
+        if param.kind == _VAR_POSITIONAL:
+            checks.append('for __mdp_v in {n}:\n        if not {t}: return False'.format(n=name,t=test.format(v='__mdp_v')))
+        elif param.kind == _VAR_KEYWORD:
+            checks.append('for __mdp_v in {n}.values():\n        if not {t}: return False'.format(n=name,t=test.format(v='__mdp_v')))
+        elif param.default is _empty:
+            checks.append('if not {t}: return False'.format(t=test.format(v=name)))
+        else:
+            checks.append('if {n} is not __mdp_default and not {t}: return False'.format(n=name,t=test.format(v=name)))
+
+    checks.append('return True')
+    source = 'def __mdp_check({params}):\n    {body}\n'.format(params=', '.join(params),body='\n    '.join(checks))
+    exec(_checker(source,func), namespace)
+    return namespace['__mdp_check']
+
+# Code of the generated checkers by their source, shared by all functions
+_checker_code = {}
+
+# Checkers of each source file, see `_Checkers`
+_checker_files = {}
+
+def _checker(source, func=None):
+    """
+    Private method. Don't use directly.
+    The code of the checker generated as `source`, compiled once per process, or once per source
+    file of `func` when it is kept on disk
+    """
+    checkers = None
+    if func is not None and _COMPILATION.cache:
+        filename = getattr(getattr(unwrap(func),'__code__',None),'co_filename',None)
+        checkers = _checker_files.get(filename)
+        if checkers is None and filename is not None:
+            with _lock:
+                checkers = _checker_files.get(filename)
+                if checkers is None:
+                    checkers = _checker_files[filename] = _Checkers(filename)
+
+    code = _checker_code.get(source)
+    if code is None and checkers is not None:
+        code = checkers.code.get(source)
+    if code is None:
+        code = compile(source,'<mydipy check>','exec')
+    _checker_code[source] = code
+    if checkers is not None and source not in checkers.code:
+        checkers.code[source] = code
+    return code
+
+class _Checkers:
+    """
+    Private class. Don't use directly.
+    Code of the checkers generated for the functions of a source file, by their source, kept on disk
+    next to the file's bytecode for as long as the file doesn't change, see `set_compilation`
+    """
+    __slots__ = ('path','stamp','code','saved')
+
+    # Changed whenever the format of the files changes
+    VERSION = 1
+
+    def __init__(self,filename):
+        self.path = self.stamp = None
+        self.code = {}
+        # Number of checkers in the file on disk
+        self.saved = 0
+        try:
+            from importlib.util import cache_from_source, MAGIC_NUMBER
+            stat = os.stat(filename)
+            # e.g. `__pycache__/module.cpython-311.mydipy`
+            self.path = cache_from_source(filename)[:-len('.pyc')]+'.mydipy'
+        except (OSError,ValueError,NotImplementedError):
+            # Not a file, such as `<stdin>`, or the interpreter doesn't cache bytecode
+            return
+        self.stamp = (self.VERSION,MAGIC_NUMBER,stat.st_mtime_ns,stat.st_size)
+        try:
+            with open(self.path,'rb') as f:
+                stamp,code = marshal.load(f)
+        except (OSError,EOFError,ValueError,TypeError):
+            return
+        if stamp == self.stamp:
+            self.code = code
+            self.saved = len(code)
+
+    def save(self):
+        """Write the checkers to disk if any were added, replacing the file at once for concurrent readers"""
+        code = dict(self.code)
+        if self.path is None or len(code) == self.saved:
+            return
+        temp = '{}.{}.tmp'.format(self.path,os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.path),exist_ok=True)
+            with open(temp,'wb') as f:
+                marshal.dump((self.stamp,code),f)
+            os.replace(temp,self.path)
+            self.saved = len(code)
+        except OSError:
+            # Read-only, like bytecode may be
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+@atexit.register
+def _save_checkers():
+    """
+    Private method. Don't use directly.
+    Save the checkers of every source file, see `_Checkers`
+    """
+    if _COMPILATION.cache and not sys.dont_write_bytecode:
+        for checkers in list(_checker_files.values()):
+            checkers.save()
+
+
+def _enforcement_from_environment():
+    """
+    Private method. Don't use directly.
+    Apply the process-wide enforcement mode given by `MYDIPY_ENFORCEMENT`, if any
+    """
+    value = os.environ.get('MYDIPY_ENFORCEMENT')
+    if value:
+        mode, *rest = value.split(':')
+        set_enforcement(mode, int(rest[0]) if rest else 1, len(rest) > 1 and rest[1] == 'random')
+
+_enforcement_from_environment()
+
+if os.environ.get('MYDIPY_COMPILATION'):
+    set_compilation(os.environ['MYDIPY_COMPILATION'])
@@ -1,8 +1,14 @@
-from .type_check import type_check, TypeCheckError
-from inspect import isfunction
-from functools import wraps
+from . import stats as _stats
+from .type_check import type_check, _COMPILATION, _LAZY, _compile_check, _needs_check, _type_determined, _instance_check, _returns_match, _resolver, _compiled, _return_annotation, _is_coroutine, _mark_coroutine, _lock
+from .generic import _erase
+from inspect import isfunction, signature, unwrap, _VAR_KEYWORD, _KEYWORD_ONLY, _VAR_POSITIONAL, _POSITIONAL_OR_KEYWORD, _empty
+from functools import wraps, update_wrapper
 from collections import defaultdict as ddict
-from typing import Iterable, Any, Type
+from typing import Any, ClassVar
+from types import MemberDescriptorType
+from heapq import heappush, heappop
+from copy import copy
+import warnings
 
 def _merge_annotations(curr,new):
     """
@@ -15,12 +21,12 @@ def _merge_annotations(curr,new):
     # Merge annotations by items in new
     for k,v in new.__annotations__.items():
         # Get a set of the annotations
-        nv = set(v) if isinstance(v,Iterable) else set([v])
+        nv = set(v) if isinstance(v,tuple) else set([v])
 
         ov = curr.__annotations__.get(k,[])
 
-        # Merge existing annotations with new ones
-        nv |= set(ov) if isinstance(ov,Iterable) else set([ov])
+        # Merge existing annotations with new ones (generics may be iterable, merged annotations are tuples)
+        nv |= set(ov) if isinstance(ov,(tuple,list)) else set([ov])
 
         # Apply
         curr.__annotations__[k] = tuple(nv)
@@ -32,6 +38,472 @@ def _merge_annotations(curr,new):
         else:
             curr.__doc__ += "\n\n"+new.__doc__
 
+# Checkers which only test whether arguments can be bound, by parameter layout, see `_Candidate`
+_binders = {}
+
+class _Candidate:
+    """
+    Private class. Don't use directly.
+
+    An overload candidate with the parameter layout used to decide which calls
+    it could possibly accept, and the `__resolve__` used to decide which it does.
+    """
+    __slots__ = ('func','index','sig','_label','resolve','determined','binder','returns','positional','varargs','named','varkw','variadic','shapes')
+
+    def __init__(self,func,index=0):
+        # Candidates are only built once called, so there's no point deferring compilation any longer
+        func = self.func = _compiled(func)
+        self.index = index
+        self._label = None
+        self.resolve = _resolver(func)
+        try:
+            sig = self.sig = signature(func)
+        except (TypeError,ValueError):
+            # No signature to go on, so it can accept anything
+            self.sig = None
+            self.binder = None
+            self.determined = not _delegates(func)
+            self.returns = _empty
+            self.variadic = 2
+            self.shapes = ()
+            return
+
+        self.returns = _return_annotation(sig,func)
+
+        # Whether rejecting arguments depends only upon their types, so the rejection may be cached
+        self.determined = not _delegates(func) and all(_type_determined(p.annotation) for p in sig.parameters.values() if _needs_check(p.annotation))
+
+        params = sig.parameters.values()
+        # Checker without any annotations, which only tests whether arguments can be bound
+        layout = tuple((p.name,p.kind,p.default is _empty) for p in params)
+        self.binder = _binders.get(layout)
+        if self.binder is None:
+            self.binder = _binders[layout] = _compile_check(sig.replace(
+                parameters=[p.replace(annotation=_empty) for p in params],
+                return_annotation=_empty),func)
+
+        self.positional = [self._annotation(p) for p in params if p.kind <= _POSITIONAL_OR_KEYWORD]
+        self.named = {p.name: self._annotation(p) for p in params if p.kind in (_POSITIONAL_OR_KEYWORD,_KEYWORD_ONLY)}
+        self.varargs = next((self._annotation(p) for p in params if p.kind == _VAR_POSITIONAL),None)
+        self.varkw = next((self._annotation(p) for p in params if p.kind == _VAR_KEYWORD),None)
+        # Number of `*args` and `**kwargs` parameters, which make a candidate less specific
+        self.variadic = sum(p.kind in (_VAR_POSITIONAL,_VAR_KEYWORD) for p in params)
+        # Shapes of calls passing positional arguments and required keyword-only ones, see `_conflicts`
+        names = frozenset(p.name for p in params if p.kind == _KEYWORD_ONLY and p.default is _empty)
+        required = sum(p.kind <= _POSITIONAL_OR_KEYWORD and p.default is _empty for p in params)
+        most = len(self.positional)+any(p.kind == _VAR_POSITIONAL for p in params)
+        self.shapes = tuple((n,names) for n in range(required,most+1))
+
+    @property
+    def label(self) -> str:
+        # Identifies the candidate in statistics and warnings, since overloads share a name
+        if self._label is None:
+            self._label = '#{}'.format(self.index) if self.sig is None else '#{} {}'.format(self.index,self.sig)
+        return self._label
+
+    @staticmethod
+    def _annotation(param):
+        # Only classes which can be decided from the type of the argument are useful. For generics
+        # such as `List[int]` the container class is still a necessary condition
+        check = _instance_check(param.annotation)
+        if check is not None and not isinstance(check,(type,tuple)):
+            check = _erase(param.annotation)
+        return check if check is not None and _type_determined(check) else None
+
+    def accepts(self,nargs,names) -> bool:
+        """Whether `nargs` positional and `names` keyword arguments can be bound"""
+        if self.binder is None:
+            return True
+        try:
+            self.binder(*(None,)*nargs,**dict.fromkeys(names))
+        except TypeError:
+            return False
+        return True
+
+    def annotation(self,key):
+        """Annotation of the positional (int) or keyword (str) argument `key`, None if any type may match"""
+        if self.binder is None:
+            return None
+        if isinstance(key,int):
+            return self.positional[key] if key < len(self.positional) else self.varargs
+        return self.named[key] if key in self.named else self.varkw
+
+    def narrower(self,other,keys) -> bool:
+        """
+        Whether, for the arguments `keys`, this candidate only accepts types `other` accepts,
+        and doesn't have more catch-all parameters
+        """
+        return self.variadic <= other.variadic and all(_narrower(self.annotation(k),other.annotation(k)) for k in keys)
+
+def _delegates(func) -> bool:
+    """
+    Private function. Don't use directly.
+
+    Whether `func`, or a callable it wraps, selects what handles a call amongst overloads or `@inherit`
+    parents of its own. Whether those accept the arguments may depend on their values, whatever the
+    annotations of `func` are.
+    """
+    try:
+        return _selects(unwrap(func,stop=_selects))
+    except ValueError:
+        # Wrappers wrapping themselves, so there's no telling
+        return True
+
+def _selects(func) -> bool:
+    # Whether `func` is an `@inherit` method or overloaded, see `_delegates`
+    # Overloaded methods resolve with their `_Dispatcher`, and `OverloadFunction` keeps it as `_funcs`
+    return bool(getattr(func,'__inherit__',False)) or isinstance(getattr(func,'_funcs',None),_Dispatcher) or \
+        isinstance(getattr(getattr(func,'__resolve__',None),'__self__',None),_Dispatcher)
+
+def _narrower(a,b) -> bool:
+    """
+    Private function. Don't use directly.
+    Whether every class matching the annotation `a` (see `_Candidate.annotation`) matches `b`
+    """
+    if b is None:
+        return True
+    if a is None:
+        return False
+    return all(issubclass(t,b) for t in (a if isinstance(a,tuple) else (a,)))
+
+def _by_specificity(candidates,keys) -> list:
+    """
+    Private function. Don't use directly.
+
+    Order `candidates` most specific first for the arguments `keys`: a candidate comes before every
+    one which accepts all the types it does and more. Others keep the order they were defined in,
+    so ties between equally specific candidates go to the first.
+    """
+    n = len(candidates)
+    if n < 2:
+        return list(candidates)
+    narrower = [[i != j and a.narrower(b,keys) for j,b in enumerate(candidates)] for i,a in enumerate(candidates)]
+    # Candidates which must come after each one, and the number which must come before
+    after = [[j for j in range(n) if narrower[i][j] and not narrower[j][i]] for i in range(n)]
+    before = [0]*n
+    for i in range(n):
+        for j in after[i]:
+            before[j] += 1
+    ready = [i for i in range(n) if not before[i]]
+    res = []
+    while ready:
+        i = heappop(ready)
+        res.append(candidates[i])
+        for j in after[i]:
+            before[j] -= 1
+            if not before[j]:
+                heappush(ready,j)
+    return res
+
+class OverloadWarning(UserWarning):
+    """Warns of overloads which are never selected, or which are only selected by the order they were defined in"""
+
+def _conflicts(candidates) -> list:
+    """
+    Private function. Don't use directly.
+
+    Problems with the overloads `candidates`, for calls passing them their positional arguments
+    and required keyword-only arguments:
+        * Overloads which are never selected, as an earlier one accepts the same arguments and returns the same
+        * Pairs of overloads where neither is more specific, so the first is selected for arguments both accept
+
+    Only overloads whose selection depends just on the types of the arguments are compared.
+
+    Returns:
+        A list of descriptions of the problems
+    """
+    # Shapes of each candidate for which an earlier one is the same, by index of the first
+    same = ddict(dict)
+    ambiguous = []
+    for nargs,names in dict.fromkeys(shape for c in candidates for shape in c.shapes):
+        keys = (*range(nargs),*sorted(names))
+        accepting = [(i,c) for i,c in enumerate(candidates) if c.determined and c.accepts(nargs,names)]
+        for n,(i,a) in enumerate(accepting):
+            for j,b in accepting[n+1:]:
+                narrower, wider = a.narrower(b,keys), b.narrower(a,keys)
+                if narrower and wider and a.returns == b.returns:
+                    same[j].setdefault((nargs,names),i)
+                elif not narrower and not wider and (i,j) not in ambiguous and \
+                        all(_narrower(a.annotation(k),b.annotation(k)) or _narrower(b.annotation(k),a.annotation(k)) for k in keys):
+                    # Some arguments match both
+                    ambiguous.append((i,j))
+
+    name = candidates[0].func.__qualname__
+    res = []
+    for j,c in enumerate(candidates):
+        if c.shapes and all(shape in same[j] for shape in c.shapes):
+            res.append('overload {} of {!r} is never selected, as {} accepts the same arguments first'.format(
+                c.label,name,candidates[same[j][c.shapes[0]]].label))
+    for i,j in ambiguous:
+        res.append('overloads {} and {} of {!r} are ambiguous, as neither is more specific, so the first is selected for arguments both accept'.format(
+            candidates[i].label,candidates[j].label,name))
+    return res
+
+class _DispatchTree:
+    """
+    Private class. Don't use directly.
+
+    Overload candidates compiled into a decision structure: split first on the number of positional
+    arguments and the set of keyword names, then on the type of the most selective argument.
+    Candidates are built on the first call, and branches as they are first reached.
+
+    Along with the dispatch cache of its `_Dispatcher`, a tree is never changed once its candidates
+    are built, only replaced, so threads read it without locking. Branches and cache entries only
+    depend on the candidates, so threads adding the same one at once add equal values.
+    """
+    __slots__ = ('funcs','cache','_candidates','_shapes','_returning')
+
+    def __init__(self,funcs):
+        self.funcs = tuple(funcs)
+        # Dispatch cache of the `_Dispatcher`, see `_Dispatcher.select`
+        self.cache = {}
+        self._candidates = None
+        self._shapes = {}
+        # Index of candidates by `_returns`, see `returning`
+        self._returning = {}
+
+    def _build(self) -> list:
+        # Once, however many threads make the first call at the same time
+        with _lock:
+            if self._candidates is None:
+                candidates = [_Candidate(f,i) for i,f in enumerate(self.funcs)]
+                for problem in _conflicts(candidates):
+                    warnings.warn(problem,OverloadWarning)
+                self._candidates = candidates
+        return self._candidates
+
+    def __call__(self,args,kwargs) -> tuple:
+        """The candidates which could accept the arguments, in order"""
+        names = frozenset(kwargs)-{'_returns'}
+        shape = (len(args),names)
+        try:
+            node = self._shapes[shape]
+        except KeyError:
+            candidates = self._candidates or self._build()
+            node = self._shapes[shape] = _TypeNode(
+                [c for c in candidates if c.accepts(len(args),names)],len(args),names)
+        return node(args,kwargs)
+
+    def returning(self,returns) -> dict:
+        """
+        Index of the candidates which could be called with `_returns=returns`, to 0 for those whose
+        return annotation is sure to match and 1 for those which only could (see `_returns_match`).
+        Candidates which can't be aren't in it
+        """
+        try:
+            return self._returning[returns]
+        except KeyError:
+            pass
+        index = {}
+        for c in self._candidates or self._build():
+            if _returns_match(c.returns,returns,True):
+                index[c] = 0
+            elif _returns_match(c.returns,returns):
+                index[c] = 1
+        try:
+            self._returning[returns] = index
+        except TypeError:
+            # Unhashable annotations
+            pass
+        return index
+
+class _TypeNode:
+    """
+    Private class. Don't use directly.
+
+    Candidates for a single call shape, most specific first (see `_by_specificity`), split on the
+    type of one argument.
+    """
+    __slots__ = ('key','_annotations','_candidates','_by_type')
+
+    def __init__(self,candidates,nargs,names):
+        keys = (*range(nargs),*sorted(names))
+        candidates = self._candidates = tuple(_by_specificity(candidates,keys))
+        self._by_type = {}
+
+        # The most selective argument is the one with the most distinct annotations amongst the candidates
+        best = (0,0)
+        self.key = None
+        for key in keys:
+            annotations = [c.annotation(key) for c in candidates]
+            score = (len(set(annotations)-{None}),sum(a is not None for a in annotations))
+            if score > best:
+                best, self.key, self._annotations = score, key, annotations
+
+    def __call__(self,args,kwargs) -> tuple:
+        if self.key is None:
+            return self._candidates
+
+        typ = type(args[self.key] if isinstance(self.key,int) else kwargs[self.key])
+        try:
+            return self._by_type[typ]
+        except KeyError:
+            res = self._by_type[typ] = tuple(c for c,a in zip(self._candidates,self._annotations) if a is None or issubclass(typ,a))
+            return res
+
+class _Dispatcher:
+    """
+    Private class. Don't use directly.
+
+    An ordered list of overload candidates with a dispatch cache. The cache maps the types of
+    the arguments, the keyword names and `_returns` to the candidates left to try, starting at the
+    first one which accepted them, so repeated calls go straight to it. Calls missing the cache only
+    try the candidates a `_DispatchTree` says could accept them, most specific first.
+
+    Candidates are selected with their non-raising `__match__`, so no exception is raised
+    unless no candidate matches at all.
+
+    Any change to the candidates must go through `append`, which replaces the tree and cache at once,
+    so calls in other threads see either the old candidates or the new ones.
+    """
+    __slots__ = ('_tree',)
+
+    def __init__(self,funcs):
+        self._tree = _DispatchTree(funcs)
+
+    @property
+    def funcs(self) -> tuple:
+        return self._tree.funcs
+
+    def append(self,func):
+        with _lock:
+            self._tree = _DispatchTree(self._tree.funcs+(func,))
+
+    def build(self):
+        """Build the candidates now rather than on the first call, warning of problems with them"""
+        self.candidates()
+
+    def candidates(self) -> list:
+        """The candidates, in the order they were defined"""
+        tree = self._tree
+        return tree._candidates or tree._build()
+
+    def returning(self,returns) -> dict:
+        """See `_DispatchTree.returning`"""
+        return self._tree.returning(returns)
+
+    def select(self,args,kwargs,rec=None):
+        """
+        Find the first (most specific) candidate which matches the arguments, without calling or raising
+
+        Args:
+            rec: Statistics record to count misses and rejections in, if any
+
+        Returns:
+            The `_Candidate` and the callable its `__resolve__` returned, which can be called
+            without checking the arguments again. Both are None if there isn't a candidate
+        """
+        tree = self._tree
+        key = self._key(args,kwargs)
+        cached = tree.cache.get(key)
+        if cached is None:
+            candidates = tree(args,kwargs)
+            returns = kwargs.get('_returns',Any)
+            if returns is not Any:
+                # Candidates sure to return the type come before those which only could, and those
+                # which can't are skipped
+                index = tree.returning(returns)
+                skipped = len(candidates)
+                candidates = (*(c for c in candidates if index.get(c) == 0),
+                    *(c for c in candidates if index.get(c) == 1))
+                if rec is not None:
+                    # Rejected for their return annotations, without checking the arguments
+                    rec.rejected += skipped-len(candidates)
+            if rec is not None:
+                rec.misses += 1
+        else:
+            candidates = cached
+
+        # First rejection which may not hold for other arguments of the same types
+        start = None
+        for i,c in enumerate(candidates):
+            leaf = c.resolve(*args,**kwargs)
+            if leaf is not None:
+                if cached is None:
+                    tree.cache[key] = candidates[i if start is None else start:]
+                return c, leaf
+            if rec is not None:
+                rec.rejected += 1
+            if start is None and not c.determined:
+                start = i
+        return None, None
+
+    @staticmethod
+    def _key(args,kwargs) -> tuple:
+        # Types are never equal to keyword names (str), so this flat key is unambiguous
+        return (kwargs.get('_returns',Any),*map(type,args),*kwargs,*map(type,kwargs.values()))
+
+    def match(self,*args,**kwargs) -> bool:
+        return self.select(args,kwargs)[0] is not None
+
+    def resolve(self,*args,**kwargs):
+        return self.select(args,kwargs)[1]
+
+    def map(self,calls,kwargs) -> list:
+        """
+        Call with each tuple of positional arguments in `calls`, and the same keyword arguments
+
+        Calls are grouped by the types of their arguments and a candidate is selected once per group.
+        Groups are run one after the other, so calls are made out of order, but results are returned
+        in the order of `calls`.
+
+        Returns:
+            The list of results
+        """
+        calls = [tuple(args) for args in calls]
+        if _stats._enabled:
+            return [self(args,kwargs) for args in calls]
+
+        groups = {}
+        for i,args in enumerate(calls):
+            groups.setdefault(tuple(map(type,args)),[]).append(i)
+
+        res = [None]*len(calls)
+        cache = self._tree.cache
+        for indices in groups.values():
+            first = calls[indices[0]]
+            c = self.select(first,kwargs)[0]
+            if c is None:
+                raise NotImplementedError("could not find valid @overload function for '"+self.funcs[0].__qualname__+"'")
+            if c.determined and cache.get(self._key(first,kwargs),(None,))[0] is c:
+                # Every candidate before it rejected the types of the arguments, and it accepts them
+                func = c.func
+                for i in indices:
+                    res[i] = func(*calls[i],**kwargs)
+            else:
+                # The selection may depend on the values, so select for each call
+                for i in indices:
+                    res[i] = self(calls[i],kwargs)
+        return res
+
+    def __call__(self,args,kwargs):
+        if _stats._enabled:
+            return self._instrumented(args,kwargs)
+        leaf = self.select(args,kwargs)[1]
+        if leaf is None:
+            raise NotImplementedError("could not find valid @overload function for '"+self.funcs[0].__qualname__+"'")
+        # Already checked by selecting it, so skip the checks of the candidate's wrappers
+        return leaf(*args,**kwargs)
+
+    def _instrumented(self,args,kwargs):
+        # `__call__`, recording statistics
+        rec = _stats._record('overload',_stats._name(self.funcs[0]))
+        rec.calls += 1
+        start = _stats._clock()
+        c = self.select(args,kwargs,rec)[0]
+        rec.check_ns += _stats._clock()-start
+        if c is None:
+            rec.errors += 1
+            raise NotImplementedError("could not find valid @overload function for '"+self.funcs[0].__qualname__+"'")
+        rec.selected[c.label] += 1
+        start = _stats._clock()
+        try:
+            res = c.func(*args,**kwargs)
+        finally:
+            rec.exec_ns += _stats._clock()-start
+        # Coroutines run once awaited
+        return _stats._timed(res,rec) if _is_coroutine(c.func) else res
+
 class _overload_dict(dict):
     """
     Private class. Don't use directly.
@@ -63,6 +535,8 @@ class _overload_dict(dict):
             if key in self._overloads and oflag:
                 # It's already been overloaded, simply add to end and exit
                 self._overloads[key].append(type_check(val))
+                # Calls return coroutines only if every overload is a coroutine function
+                _mark_coroutine(self[key],all(_is_coroutine(f) for f in self._overloads[key].funcs))
 
                 # Update the annotations/docstrings
                 _merge_annotations(self[key],val)
@@ -73,23 +547,33 @@ class _overload_dict(dict):
             elif oflag and getattr(self[key],'__overload__',self._mapped_overloads[key]):
                 # We've got ourselves some brand new overloaded functions
 
-                # List of functions to try
-                funcs = [type_check(self[key]),type_check(val)]
-                self._overloads[key] = funcs
+                # Functions to try
+                dispatch = _Dispatcher([type_check(self[key]),type_check(val)])
+                self._overloads[key] = dispatch
 
                 # Wrapper method which tries them in series
                 @wraps(self[key])
                 def wrapper(*args,**kwargs):
-                    # funcs is a pointer so as we append it'll pick up the later ones
-                    for f in funcs:
-                        # Check if this function annotations match
-                        try:
-                            return f(*args,**kwargs)
-                        except TypeCheckError:
-                            pass
-                    raise NotImplementedError("could not find valid @overload function for '"+funcs[0].__qualname__+"'")
+                    # dispatch is a pointer so as we append it'll pick up the later ones
+                    return dispatch(args,kwargs)
 
+                def batch(calls,_executor=None,_chunksize=1024,**kwargs):
+                    """
+                    Call with each tuple of positional arguments in `calls`, starting with the instance,
+                    selecting the overload once per distinct types of the arguments. Results are in order.
+                    See `OverloadFunction.map` for running them with `_executor`
+                    """
+                    if _executor is not None:
+                        return _parallel(wrapper,calls,_executor,_chunksize,kwargs)
+                    return dispatch.map(calls,kwargs)
+
+                # Merged into a copy, rather than the annotations of the first overload
+                wrapper.__annotations__ = dict(wrapper.__annotations__)
                 wrapper.__typed__ = True
+                wrapper.__match__ = dispatch.match
+                wrapper.__resolve__ = dispatch.resolve
+                wrapper.map = batch
+                _mark_coroutine(wrapper,all(_is_coroutine(f) for f in dispatch.funcs))
 
                 # Update the annotations/docstrings
                 _merge_annotations(wrapper,val)
@@ -99,6 +583,243 @@ class _overload_dict(dict):
         # Go ahead and set the item in the dictionary
         super().__setitem__(key,val)
 
+class _CastTable(dict):
+    """
+    Private class. Don't use directly.
+
+    How `cast` converts instances of a `TypedMeta` class with overloaded `__cast__` methods: by target
+    class, the function a call of `__cast__(_returns=target)` ends up calling, or None if that may
+    depend on more than the class of the instance (so `cast` has to call `__cast__`). Overloads
+    inherited with `@inherit` from a single parent come from the table of the parent, so tables are
+    merged down the MRO.
+
+    Kept as `__casts__` by `TypedMeta`, which fills in the classes the overloads return when the class
+    is created (on the first cast when compiling lazily). Other targets are filled in when first cast to.
+    """
+    __slots__ = ('owner','method','dispatch')
+
+    def __init__(self,owner,method,dispatch):
+        super().__init__()
+        self.owner = owner
+        # The `__cast__` of `owner`, so a replaced one isn't looked up here, see `_casts`
+        self.method = method
+        self.dispatch = dispatch
+
+    def __missing__(self,target):
+        res = self[target] = self._select(target) if isinstance(target,type) else None
+        return res
+
+    def fill(self):
+        """Fill in the classes the overloads, and those inherited from a single parent, return"""
+        for c in self.dispatch.candidates():
+            parent = self._parent(c)
+            for target in (parent if parent is not None else (c.returns,)):
+                if isinstance(target,type) and target is not _empty:
+                    self[target]
+
+    def _parent(self,candidate):
+        # The table of the single parent `candidate` inherits `__cast__` from, if it is an `@inherit` method
+        parents = getattr(candidate.func,'__parents__',None)
+        if parents is None:
+            return None
+        parents = parents(self.owner)
+        return _casts(parents[0]) if len(parents) == 1 else None
+
+    def _select(self,target):
+        """
+        The function for `target`, as selected by `_Dispatcher.select`, or None if it may depend on the instance.
+        Only overloads `_returns_match` accepts for `target` are selected, never one annotated as returning
+        a superclass of it. Without one, `cast` calls `__cast__` and checks the class of the result instead
+        """
+        candidates = []
+        for c in self.dispatch.candidates():
+            if not c.accepts(1,()):
+                continue
+            # `@inherit` methods aren't determined, but are looked up in the table of their parent, see below
+            inherits = hasattr(c.func,'__parents__')
+            if c.sig is None or not (c.determined or inherits) or next(iter(c.sig.parameters.values())).annotation is not _empty:
+                # Selecting it may depend on the instance
+                return None
+            candidates.append(c)
+        index = self.dispatch.returning(target)
+        candidates = _by_specificity(candidates,(0,))
+        selected = next((c for rank in (0,1) for c in candidates if index.get(c) == rank),None)
+        if selected is None:
+            return None
+        if hasattr(selected.func,'__parents__'):
+            # Goes straight to the single parent, if there is one
+            parent = self._parent(selected)
+            return None if parent is None else parent[target]
+        # The instance isn't checked, as its parameter isn't annotated
+        return selected.resolve(None,_returns=target)
+
+def _casts(cls):
+    """
+    Private function. Don't use directly.
+    The `_CastTable` of instances of `cls`, or None if its `__cast__` doesn't have one
+    """
+    for c in getattr(cls,'__mro__',()):
+        method = vars(c).get('__cast__')
+        if method is not None:
+            table = vars(c).get('__casts__')
+            return table if table is not None and table.method is method else None
+    return None
+
+class _TypedField:
+    """
+    Private class. Don't use directly.
+
+    Descriptor checking the values assigned to an annotated attribute of an `OverloadObject`.
+    Values are kept in the instance dictionary under the same name.
+    """
+    __slots__ = ('name','annotation','check','plain','default')
+
+    def __init__(self, name, annotation, check, default=_empty):
+        self.name = name
+        self.annotation = annotation
+        # Compiled check, see `_instance_check`
+        self.check = check
+        # Whether the check is a class (or tuple of classes)
+        self.plain = isinstance(check,(type,tuple))
+        # Class level value, returned until the attribute is assigned
+        self.default = default
+
+    def valid(self, val) -> bool:
+        return isinstance(val,self.check) if self.plain else self.check(val)
+
+    def error(self, obj, val) -> TypeError:
+        return TypeError('cannot assign {val!r} to {key!r} which is of {typ!r}'.format(
+            val=str(type(val)),
+            typ=str(self.annotation),
+            key=type(obj).__qualname__+'.'+self.name)
+        )
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self if self.default is _empty else self.default
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            if self.default is not _empty:
+                return self.default
+        raise AttributeError('{cls!r} object has no attribute {key!r}'.format(cls=type(obj).__name__,key=self.name))
+
+    def __set__(self, obj, val):
+        check = self.check
+        if not (isinstance(val,check) if self.plain else check(val)):
+            raise self.error(obj,val)
+        obj.__dict__[self.name] = val
+
+    def __delete__(self, obj):
+        try:
+            del obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def assign(self, obj, val):
+        """Assign a value which was already checked"""
+        obj.__dict__[self.name] = val
+
+class _TypedSlot(_TypedField):
+    """
+    Private class. Don't use directly.
+    `_TypedField` of a class created with `slots=True`, keeping values in its slot
+    """
+    __slots__ = ('slot','_get','_set')
+
+    def __init__(self, name, annotation, check, slot, default=_empty):
+        super().__init__(name,annotation,check,default)
+        # Member descriptor of the slot, and its methods bound once
+        self.slot = slot
+        self._get = slot.__get__
+        self._set = slot.__set__
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self if self.default is _empty else self.default
+        try:
+            return self._get(obj,cls)
+        except AttributeError:
+            if self.default is _empty:
+                raise
+            return self.default
+
+    def __set__(self, obj, val):
+        check = self.check
+        if not (isinstance(val,check) if self.plain else check(val)):
+            raise self.error(obj,val)
+        self._set(obj,val)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+    def assign(self, obj, val):
+        self._set(obj,val)
+
+def _slotted(namespace, bases) -> dict:
+    """
+    Private function. Don't use directly.
+
+    Add a slot to `namespace` for each annotated field which its `bases` don't already have a slot for,
+    and one for weak references unless they already support them. Class level defaults of those fields
+    would clash with their slots, so they are removed and returned by name to be kept by their
+    `_TypedSlot` instead.
+    """
+    inherited = set(k for b in bases for k,f in getattr(b,'__fields__',{}).items() if isinstance(f,_TypedSlot))
+    names = [k for k,a in namespace.get('__annotations__',{}).items()
+        if k not in inherited and a is not ClassVar and getattr(a,'__origin__',None) is not ClassVar]
+    defaults = {k: namespace.pop(k) for k in names if k in namespace}
+    slots = tuple(namespace.get('__slots__',()))
+    if '__weakref__' not in slots and not any(hasattr(b,'__weakref__') for b in bases):
+        names.append('__weakref__')
+    namespace['__slots__'] = slots+tuple(names)
+    return defaults
+
+def _typed_fields(cls, namespace, defaults={}):
+    """
+    Private function. Don't use directly.
+
+    Build the table of typed fields of `cls` by name, from its annotations and those of its parents, and
+    install a `_TypedField` for each annotated field of `cls` which restricts its values. Fields which
+    aren't annotated, or are annotated with `Any`, `object` or a `ClassVar`, are plain attributes.
+    """
+    table = {}
+    for base in reversed(cls.__mro__[1:]):
+        table.update(getattr(base,'__fields__',{}))
+    annotations = namespace.get('__annotations__',{})
+    for key, annotation in annotations.items():
+        if annotation is ClassVar or getattr(annotation,'__origin__',None) is ClassVar:
+            table.pop(key,None)
+            continue
+        check = _instance_check(annotation)
+        slot = vars(cls).get(key)
+        if not isinstance(slot,MemberDescriptorType):
+            slot = getattr(table.get(key),'slot',None)
+        if check is None and (slot is not None or (key in table and key not in namespace)):
+            # Anything may be assigned, but there is a slot or a field of a parent to replace
+            check = object
+        if check is None:
+            table.pop(key,None)
+            continue
+        default = defaults.get(key,namespace.get(key,_empty))
+        if slot is None:
+            table[key] = _TypedField(key,annotation,check,default)
+        else:
+            table[key] = _TypedSlot(key,annotation,check,slot,default)
+        setattr(cls,key,table[key])
+    for key, field in list(table.items()):
+        if key not in namespace or key in annotations:
+            continue
+        if hasattr(type(namespace[key]),'__get__'):
+            # Replaced by a method, property or other descriptor
+            del table[key]
+        else:
+            # A parent's field given a new default without annotating it again
+            field = table[key] = copy(field)
+            field.default = namespace[key]
+            setattr(cls,key,field)
+    cls.__fields__ = table
+
 class TypedMeta(type):
     """
     A metaclass where function my be overloaded and executed with multiple dispatch.
@@ -109,6 +830,9 @@ class TypedMeta(type):
     Args:
         auto_overload:
             When inheriting from this metaclass, the
+        slots:
+            Whether to give annotated fields `__slots__` rather than giving each instance a dictionary.
+            Values assigned to them are still checked. Default False
 
     Example:
         >>> class Example(metaclass=TypedMeta):
@@ -123,14 +847,40 @@ class TypedMeta(type):
         >>> print(ex.a(1))
         int
     """
-    def __prepare__(name, bases, **kwds):
+    def __prepare__(name, bases, slots=False, **kwds):
         # Dictionary that handles @overload methods intelligently
         return _overload_dict(bases=bases, **kwds)
 
-    def __new__(metacls, name, bases, namespace, **kwds):
+    def __new__(metacls, name, bases, namespace, slots=False, **kwds):
+        # Slots for annotated fields, instead of a dictionary per instance
+        defaults = _slotted(namespace, bases) if slots else {}
         obj = type.__new__(metacls, name, bases, namespace)
         # Create empty annotations if they don't exist
         setattr(obj, '__annotations__', getattr(obj, '__annotations__', {}))
+
+        # Typed fields, for classes which have them
+        if slots or getattr(obj, '__fields__', None) is not None:
+            _typed_fields(obj, namespace, defaults)
+
+        # Resolve the parents of `@inherit` methods (including overloads) for this class, now it exists
+        overloads = getattr(namespace, '_overloads', {})
+        for key, val in namespace.items():
+            for func in (overloads[key].funcs if key in overloads else (val,)):
+                bind = getattr(func, '__inherit__', None)
+                if callable(bind):
+                    bind(obj)
+
+        # Order overloads and warn of those which are never selected when the class is created,
+        # unless compiling lazily
+        if _COMPILATION.mode is not _LAZY:
+            for dispatch in overloads.values():
+                dispatch.build()
+
+        # How `cast` converts instances, without dispatching `__cast__` each time
+        if '__cast__' in overloads:
+            obj.__casts__ = _CastTable(obj, namespace['__cast__'], overloads['__cast__'])
+            if _COMPILATION.mode is not _LAZY:
+                obj.__casts__.fill()
         return obj
 
 # class TypedObject(metaclass=TypedMeta):
@@ -147,6 +897,7 @@ class OverloadObject(metaclass=TypedMeta):
 
     Args:
         auto_overload : whether to automatically overload (true) or only when the `@overload` decorator is used. Default True
+        slots : whether annotated fields are kept in `__slots__` rather than the dictionary of the instance. Default False
 
     Example:
         >>> class A(OverloadObject):
@@ -170,15 +921,29 @@ class OverloadObject(metaclass=TypedMeta):
         Value=test
     """
 
-    def __setattr__(self, key, val):
-        # if key in self.__annotations__ and not isinstance(val,self.__annotations__[key]):
-        if not isinstance(val,self.__annotations__.get(key,object)):
-            raise TypeError('cannot assign {val!r} to {key!r} which is of {typ!r}'.format(
-                val=str(type(val)),
-                typ=str(self.__annotations__.get(key,object)),
-                key=self.__class__.__qualname__+'.'+key)
-            )
-        super().__setattr__(key,val)
+    # Typed fields by name, built by `TypedMeta` for each subclass. Only annotated fields check the values
+    # assigned to them, other attributes are assigned as usual
+    __fields__ = {}
+
+    def update(self, **fields):
+        """
+        Assign several attributes at once, checking all of them before any is assigned
+
+        Raises:
+            TypeError: If any value doesn't match the annotation of its field, in which case nothing is assigned
+        """
+        table = type(self).__fields__
+        for key, val in fields.items():
+            field = table.get(key)
+            if field is not None and not field.valid(val):
+                raise field.error(self,val)
+        for key, val in fields.items():
+            field = table.get(key)
+            if field is not None:
+                field.assign(self,val)
+            else:
+                setattr(self,key,val)
+        return self
 
     def __cast__(self) -> str:
         """Cast function to str"""
@@ -188,10 +953,10 @@ class OverloadObject(metaclass=TypedMeta):
         return self.__int__()
     def __cast__(self) -> bool:
         """Cast function to bool"""
-        return self.__nonzero__()
+        return bool(self)
     def __cast__(self):
         """Cast function to throw an error for all other types"""
-        raise NotImplementedError('cannot convert \'{inst!r}\' of type {obj!r} to {typ!r}'.format(inst=self.__class__.__qualname__,obj=str(type(self)),typ=str(cls)))
+        raise NotImplementedError('cannot convert {inst!r} of type {obj}'.format(inst=self.__class__.__qualname__,obj=type(self)))
 
 class OverloadFunction:
     """
@@ -217,15 +982,53 @@ class OverloadFunction:
         Returns:
             OverloadFunction instance which behaves like a function
         """
-        self._funcs=[type_check(func)]
+        self._funcs=_Dispatcher([type_check(func)])
+        update_wrapper(self,func)
+        self.__annotations__=dict(func.__annotations__)
+        _mark_coroutine(self,_is_coroutine(func))
 
     def __call__(self,*args,**kwargs):
-        for f in self.funcs:
-            try:
-                return f(*args,**kwargs)
-            except TypeCheckError:
-                pass
-        raise NotImplementedError("could not find valid @overload function for '"+funcs[0].__qualname__+"'")
+        return self._funcs(args,kwargs)
+
+    def __match__(self,*args,**kwargs) -> bool:
+        """Whether a call with these arguments would find a valid overload, without raising"""
+        return self._funcs.match(*args,**kwargs)
+
+    def __resolve__(self,*args,**kwargs):
+        """The overload which would handle a call with these arguments, already checked, or None"""
+        return self._funcs.resolve(*args,**kwargs)
+
+    def map(self,calls,_executor=None,_chunksize=1024,**kwargs) -> list:
+        """
+        Call the function with each tuple of positional arguments, selecting the overload once per
+        distinct types of the arguments rather than once per call.
+
+        Calls are grouped by the types of their arguments, so they may be made out of order, but
+        results are returned in the order of `calls`.
+
+        With an `_executor`, such as a `concurrent.futures.ProcessPoolExecutor`, the groups are split
+        into chunks which are mapped by its workers. The function is sent to them by reference to where
+        it is defined (like any function), so it must be importable from its module, and the arguments
+        and results must be picklable.
+
+        Args:
+            calls : Iterable of tuples of positional arguments
+            _executor : Executor to run chunks of the calls, or None to call them here
+            _chunksize : Maximum number of calls per chunk sent to the executor
+            kwargs : Keyword arguments passed to every call, such as `_returns`
+        Returns:
+            The list of results
+        Raises:
+            ValueError: If the chunk size isn't positive
+        Example:
+            >>> test.map([('a',), (1,), ('b',)])
+            ['String', 'Integer', 'String']
+            >>> with ProcessPoolExecutor() as pool:
+            ...     test.map([(i,) for i in range(10000)], _executor=pool)
+        """
+        if _executor is not None:
+            return _parallel(self,calls,_executor,_chunksize,kwargs)
+        return self._funcs.map(calls,kwargs)
 
     def overload(self,func):
         """
@@ -238,8 +1041,45 @@ class OverloadFunction:
         """
         self._funcs.append(type_check(func))
         _merge_annotations(self,func)
+        # Calls return coroutines only if every overload is a coroutine function
+        _mark_coroutine(self,all(_is_coroutine(f) for f in self._funcs.funcs))
         return self
 
+    def __reduce__(self):
+        # Pickled by reference to where it is defined, like functions, so it can be sent to other processes
+        return self.__qualname__
+
+def _parallel(func,calls,executor,chunksize,kwargs) -> list:
+    """
+    Private function. Don't use directly.
+
+    Call `func.map` on chunks of at most `chunksize` of `calls` with `executor`. Calls are chunked
+    by the types of their arguments, so each chunk selects its overloads once per type.
+    Results are in the order of `calls`
+    """
+    if not isinstance(chunksize,int) or chunksize < 1:
+        raise ValueError('calls need a chunk size of one or more, not {chunksize!r}'.format(chunksize=chunksize))
+    calls = [tuple(args) for args in calls]
+    groups = {}
+    for i,args in enumerate(calls):
+        groups.setdefault(tuple(map(type,args)),[]).append(i)
+    order = [i for indices in groups.values() for i in indices]
+
+    chunks = [order[n:n+chunksize] for n in range(0,len(order),chunksize)]
+    futures = [executor.submit(_map_chunk,func,[calls[i] for i in chunk],kwargs) for chunk in chunks]
+    res = [None]*len(calls)
+    for chunk,future in zip(chunks,futures):
+        for i,value in zip(chunk,future.result()):
+            res[i] = value
+    return res
+
+def _map_chunk(func,calls,kwargs) -> list:
+    """
+    Private function. Don't use directly.
+    Run by the workers of `_parallel`
+    """
+    return func.map(calls,**kwargs)
+
 def overload(func):
     """
     Overload decorator for class methods where auto_overload=False.
@@ -1,5 +1,6 @@
+import importlib.util
 import unittest
-from mydipy import cast, to, OverloadObject, inherit
+from mydipy import cast, to, cast_many, cast_iter, OverloadObject, inherit
 
 class TestCast(unittest.TestCase):
     def setUp(self):
@@ -21,7 +22,7 @@ class TestCast(unittest.TestCase):
             # Let's convert this currency back into dollars so we can do exchanges
             def __cast__(self) -> Currency:
                 return Dollar(self.value * self.exchange_ratio)
-            # This will mean we will automatically use __str__, __int__, and __nonzero__ to convert to str, int, and bool respectively
+            # This will mean we will automatically use __str__, __int__, and __bool__ to convert to str, int, and bool respectively
             @inherit
             def __cast__(self): ...
             def __add__(self, oth : Currency) -> Currency:
@@ -47,3 +48,141 @@ class TestCast(unittest.TestCase):
         self.assertEqual(cast(self.Dollar, self.b).value, 3.63)
         self.assertEqual(str(self.b -to>> self.Dollar), "$3.63")
         self.assertEqual((self.a+self.b).value, 18.15)
+
+    def test_2(self):
+        """Cached and compiled routes"""
+        from mydipy.cast import AUTOMATIC_CONVERSIONS
+        for _ in range(2):
+            self.assertEqual(cast(self.Dollar, self.b).value, 3.63)
+            self.assertEqual(cast(str, 5.1), '5.1')
+            with self.assertRaises(NotImplementedError): cast(int, object())
+
+        # Failures which depend on the value aren't cached
+        with self.assertRaises(NotImplementedError): cast(int, 'x')
+        self.assertEqual(cast(int, '12'), 12)
+        with self.assertRaises(NotImplementedError): cast(dict, [1, 2])
+        self.assertEqual(cast(dict, [('a', 1)]), {'a': 1})
+
+        to_str = cast.compile(float, str)
+        self.assertEqual(to_str(5.1), '5.1')
+        to_dollar = cast.compile(self.Euro, self.Dollar)
+        self.assertEqual(to_dollar(self.b).value, 3.63)
+        with self.assertRaises(NotImplementedError): cast.compile(object, int)(object())
+
+        # Changing the conversions is picked up
+        class Text(str): pass
+        self.assertEqual(type(cast(Text, 1)), Text)
+        AUTOMATIC_CONVERSIONS[Text] = lambda obj: 'converted'
+        try:
+            self.assertEqual(cast(Text, 1), 'converted')
+        finally:
+            del AUTOMATIC_CONVERSIONS[Text]
+        self.assertEqual(cast(Text, 1), '1')
+
+    def test_3(self):
+        """Chains of registered converters"""
+        Dollar, Euro = self.Dollar, self.Euro
+        class Ledger:
+            def __init__(self, value):
+                self.value = value
+        class Report:
+            def __init__(self, text):
+                self.text = text
+
+        # Subclasses of the source use its converters too
+        @cast.register(Dollar, Ledger)
+        def dollar_to_ledger(obj):
+            return Ledger(cast(Dollar, obj).value)
+        cast.register(Ledger, Report, lambda obj: Report('total ' + str(obj.value)))
+        self.addCleanup(cast.unregister, Dollar, Ledger)
+        self.addCleanup(cast.unregister, Ledger, Report)
+
+        self.assertEqual(cast(Ledger, self.a).value, 5)
+        self.assertEqual(cast(Report, self.a).text, 'total 5')
+        self.assertEqual(cast(Report, self.b).text, 'total 3.63')
+        self.assertEqual(cast.compile(Euro, Report)(self.b).text, 'total 3.63')
+
+        # Cheaper converters registered later are picked up
+        euros = cast.register(Euro, Report, lambda obj: Report('euros'), cost=0.5)
+        self.assertEqual(cast(Report, self.b).text, 'euros')
+        self.assertEqual(cast(Report, self.a).text, 'total 5')
+
+        # As are converters removed
+        cast.unregister(Euro, Report, euros)
+        self.assertEqual(cast(Report, self.b).text, 'total 3.63')
+        with self.assertRaises(KeyError): cast.unregister(Euro, Report)
+
+        with self.assertRaises(TypeError): cast.register(Euro, 'Report', str)
+        with self.assertRaises(ValueError): cast.register(Euro, Report, str, cost=-1)
+
+    def test_4(self):
+        """Casting many objects"""
+        values = [self.a, self.b, 1, 2.5, self.b]
+        self.assertEqual(cast_many(str, values), [cast(str, v) for v in values])
+        self.assertEqual(cast_many(float, ['1.5', 2, 2.5]), [1.5, 2.0, 2.5])
+        stream = cast_iter(int, iter(['1', '2', 'x']))
+        self.assertEqual(next(stream), 1)
+        self.assertEqual(next(stream), 2)
+        with self.assertRaises(NotImplementedError): next(stream)
+        self.assertEqual(cast_many(int, []), [])
+
+    @unittest.skipIf(importlib.util.find_spec('numpy') is None, 'requires numpy')
+    def test_5(self):
+        """NumPy arrays are cast at once"""
+        import numpy
+        arr = numpy.arange(5)
+        res = cast_many(float, arr)
+        self.assertIsInstance(res, numpy.ndarray)
+        self.assertEqual(res.dtype, numpy.float64)
+        self.assertEqual(cast_many(numpy.dtype('int8'), arr).dtype, numpy.int8)
+        self.assertEqual(cast_many(str, arr), ['0', '1', '2', '3', '4'])
+        self.assertEqual(cast_many(int, numpy.array([1.5, 2.0])).tolist(), [1, 2])
+
+        # Other arrays are cast one object at a time, with converters and errors as for lists
+        class Amount:
+            pass
+        cast.register(Amount, int, lambda obj: 7)
+        self.addCleanup(cast.unregister, Amount, int)
+        self.assertEqual(cast_many(int, numpy.array([Amount(), '2'], dtype=object)), [7, 2])
+        with self.assertRaises(NotImplementedError): cast_many(int, numpy.array(['1', 'x']))
+        # As are floats which don't all fit the integer type
+        with self.assertRaises(NotImplementedError): cast_many(int, numpy.array([1.5, numpy.nan]))
+        with self.assertRaises(NotImplementedError): cast_many(int, numpy.array([numpy.inf]))
+        self.assertEqual(cast_many(int, numpy.array([1e30])), [int(1e30)])
+
+    def test_6(self):
+        """Typed classes look up which __cast__ overload to call in a table merged down the MRO"""
+        Dollar, Euro = self.Dollar, self.Euro
+        self.assertEqual(cast(str, self.b), '€3')
+        self.assertIs(cast(bool, self.b), True)
+        self.assertEqual(cast(Dollar, self.b).value, 3.63)
+        with self.assertRaises(NotImplementedError): cast(float, self.b)
+        # Filled when the class is created, or as targets are first cast to when compiling lazily
+        self.assertIs(Euro.__casts__, Dollar.__casts__)
+        self.assertLessEqual({str, bool, Dollar}, set(Dollar.__casts__))
+        # Overloads inherited with @inherit are looked up in the table of the parent
+        self.assertIsNotNone(Dollar.__casts__[str])
+
+        # Selected as a call of __cast__ would, by specificity and then definition order
+        class Note(OverloadObject):
+            def __cast__(self, *args) -> str: return 'variadic'
+            def __cast__(self) -> object: return 'object'
+            def __cast__(self) -> str: return 'str'
+            def __cast__(self, strict: bool = False) -> str: return 'later'
+        self.assertEqual(cast(str, Note()), Note().__cast__(_returns=str))
+        # Overloads annotated with a superclass of the target aren't selected for it
+        with self.assertRaises(NotImplementedError): Note().__cast__(_returns=list)
+        with self.assertRaises(NotImplementedError): cast(list, Note())
+        # Nor looked up in the table, but their results are used if they are of the target class
+        class Box(OverloadObject):
+            def __cast__(self) -> object: return [1]
+            def __cast__(self) -> str: return 'box'
+        self.assertIsNone(Box.__casts__[list])
+        self.assertEqual(cast(list, Box()), [1])
+        with self.assertRaises(NotImplementedError): cast(tuple, Box())
+        self.assertEqual(cast(str, Box()), 'box')
+
+        # A replaced __cast__ isn't looked up in the table
+        Note.__cast__ = lambda self: 'replaced'
+        cast.cache_clear()
+        self.assertEqual(cast(str, Note()), 'replaced')
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from typing import Awaitable
+from mydipy import type_check, TypeCheckError, OverloadObject, inherit
+
+def run(coro):
+	# `asyncio.run` needs Python 3.7
+	loop = asyncio.new_event_loop()
+	try:
+		return loop.run_until_complete(coro)
+	finally:
+		loop.close()
+
+class TestCoroutine(unittest.TestCase):
+	def test_1(self):
+		"""Coroutine functions"""
+		@type_check
+		async def fnc(val: int) -> int: return val+1
+		self.assertTrue(asyncio.iscoroutinefunction(fnc))
+		self.assertEqual(run(fnc(1)),2)
+		# Checked before the coroutine is created
+		with self.assertRaises(TypeCheckError): fnc("a")
+
+		class A(OverloadObject):
+			async def get(self, val: int) -> int: return val
+			async def get(self, val: str) -> str: raise NotImplementedError()
+			def both(self, val: int) -> int: return val
+			async def both(self, val: int) -> int: return -val
+		class B(OverloadObject):
+			async def get(self, val: str) -> str: return "B"+val
+		class C(A,B):
+			@inherit(A,B)
+			async def get(self, val): ...
+
+		a, c = A(), C()
+		self.assertTrue(asyncio.iscoroutinefunction(A.get))
+		self.assertFalse(asyncio.iscoroutinefunction(A.both))
+		self.assertEqual(run(a.get(1)),1)
+		self.assertEqual(a.both(1),1)
+		self.assertEqual(run(a.both(1,_returns=Awaitable[int])),-1)
+
+		self.assertTrue(asyncio.iscoroutinefunction(C.get))
+		self.assertEqual(run(c.get(2)),2)
+		# A's overload only raises once awaited, so B's is awaited instead
+		self.assertEqual(run(c.get("c")),"Bc")
+		with self.assertRaises(TypeCheckError): c.get(1.0)
@@ -0,0 +1,103 @@
+import unittest
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+from mydipy import type_check, TypeCheckError, OverloadFunction, set_container_checks, get_container_checks
+
+class TestGeneric(unittest.TestCase):
+	def tearDown(self):
+		set_container_checks()
+
+	def test_1(self):
+		@type_check
+		def fnc(a: List[int], b: Dict[str, float], c: Optional[int]=None, d: Tuple[int, str]=(0,''), e: Union[int, List[str]]=0) -> List[int]:
+			return a
+
+		self.assertEqual(fnc([1,2],{'x':1.0}),[1,2])
+		self.assertEqual(fnc([],{},None,(1,'a'),['x']),[])
+		self.assertRaises(TypeCheckError,fnc,['1'],{})
+		self.assertRaises(TypeCheckError,fnc,(1,),{})
+		self.assertRaises(TypeCheckError,fnc,[1],{1:1.0})
+		self.assertRaises(TypeCheckError,fnc,[1],{},'1')
+		self.assertRaises(TypeCheckError,fnc,[1],{},None,(1,2))
+		self.assertRaises(TypeCheckError,fnc,[1],{},None,(1,'a','b'))
+		self.assertRaises(TypeCheckError,fnc,[1],{},None,(1,'a'),[1])
+
+	def test_2(self):
+		@type_check
+		def fnc(a: List[int]): return a
+
+		late = list(range(10))+['x']
+		self.assertEqual(get_container_checks(),('first',5,1024))
+		self.assertEqual(fnc(late),late)
+		set_container_checks('full')
+		self.assertRaises(TypeCheckError,fnc,late)
+		set_container_checks('first',0)
+		self.assertEqual(fnc(['x']),['x'])
+		set_container_checks('sample',3)
+		self.assertRaises(TypeCheckError,fnc,['x']*10)
+		self.assertRaises(ValueError,set_container_checks,'some')
+		self.assertRaises(ValueError,set_container_checks,'full',-1)
+
+	def test_3(self):
+		@OverloadFunction
+		def fnc(a: List[int]) -> str: return 'ints'
+		@fnc.overload
+		def fnc(a: List[str]) -> str: return 'strs'
+		@fnc.overload
+		def fnc(a: Dict[str, Any]) -> str: return 'dict'
+		@fnc.overload
+		def fnc(a): return 'any'
+
+		self.assertEqual(fnc([1]),'ints')
+		self.assertEqual(fnc(['a']),'strs')
+		self.assertEqual(fnc({'a':None}),'dict')
+		self.assertEqual(fnc(1),'any')
+		self.assertEqual(fnc([1]),'ints')
+
+	def test_4(self):
+		"""Immutable containers which passed are remembered"""
+		from mydipy import generic
+
+		@type_check
+		def fnc(a: Tuple[int, ...]=(), b: FrozenSet[str]=frozenset(), c: Tuple[List[int], ...]=()): return a
+
+		set_container_checks('full')
+		table = tuple(range(100))
+		fnc(table,frozenset(map(str,range(100))))
+		self.assertEqual(len(generic._memo),2)
+		fnc(table)
+		self.assertEqual(len(generic._memo),2)
+
+		# Containers of mutable values are never remembered
+		rows = tuple([1] for _ in range(20))
+		fnc(c=rows)
+		rows[-1].append('x')
+		self.assertRaises(TypeCheckError,fnc,c=rows)
+
+		set_container_checks('full',cache=1)
+		fnc(table,frozenset(map(str,range(100))))
+		self.assertEqual(len(generic._memo),1)
+		set_container_checks('full',cache=0)
+		fnc(table)
+		self.assertEqual(len(generic._memo),0)
+
+	def test_5(self):
+		"""Remembered containers aren't checked again, once enough of their elements are checked"""
+		class Spy(type):
+			checks = 0
+			def __instancecheck__(cls, obj):
+				Spy.checks += 1
+				return True
+		class Checked(metaclass=Spy): pass
+
+		@type_check
+		def fnc(a: Tuple[Checked, ...]): return a
+
+		table = tuple(range(100))
+		# Settings, and the elements checked by the first call and by the same call again
+		for settings,first,again in ((('first',5),5,5),(('first',20),20,0),(('full',5),100,0)):
+			set_container_checks(*settings)
+			Spy.checks = 0
+			fnc(table)
+			self.assertEqual(Spy.checks,first)
+			fnc(table)
+			self.assertEqual(Spy.checks,first+again)
@@ -25,3 +25,75 @@ class TestInherit(unittest.TestCase):
 		self.assertEqual(self.clsa.test(),1)
 		self.assertEqual(self.clsb.test(),1)
 		self.assertEqual(self.clsb.test2(),2)
+
+	def test_2(self):
+		"""Parents are those of the class defining the method, whichever subclass calls first"""
+		class A:
+			def test(self): return "A"
+		class B(A):
+			@inherit
+			def test(self): ...
+		class C(B):
+			pass
+		class D(C):
+			@inherit
+			def test(self): ...
+
+		self.assertEqual(D().test(),"A")
+		self.assertEqual(C().test(),"A")
+		self.assertEqual(B().test(),"A")
+
+	def test_3(self):
+		"""Overloaded methods resolve their parents when the class is created"""
+		from mydipy import OverloadObject, cast
+		class Dollar(OverloadObject):
+			def __init__(self, value): self.value = value
+			def __str__(self): return "$"+str(self.value)
+			def __cast__(self) -> int: return self.value
+			@inherit
+			def __cast__(self): ...
+		class Euro(Dollar):
+			def __str__(self): return "€"+str(self.value)
+
+		for _ in range(2):
+			self.assertEqual(cast(str,Euro(3)),"€3")
+			self.assertEqual(cast(int,Euro(3)),3)
+			self.assertEqual(cast(str,Dollar(5)),"$5")
+
+	def test_4(self):
+		"""Arguments are checked once however many wrappers a call goes through"""
+		from mydipy import OverloadObject
+		checks = []
+		class Counted(type):
+			def __instancecheck__(cls, obj):
+				checks.append(obj)
+				return isinstance(obj,int)
+		class Num(metaclass=Counted): pass
+
+		class A(OverloadObject):
+			def test(self, val: Num) -> str: return "num"
+			def test(self, val: str) -> str: return "str"
+		class B(A):
+			def test(self, val: float) -> str: return "float"
+			@inherit
+			def test(self, val): ...
+		class C(B):
+			@inherit
+			def test(self, val): ...
+
+		for inst in (B(),C()):
+			del checks[:]
+			self.assertEqual(inst.test(1),"num")
+			self.assertEqual(len(checks),1)
+
+	def test_5(self):
+		"""Typed classes look up the parents of @inherit methods when they are created, unless compiling lazily"""
+		from mydipy import OverloadObject, get_compilation
+		class A(OverloadObject):
+			def test(self) -> str: return "A"
+		class B(A):
+			@inherit
+			def test(self): ...
+
+		A.test = lambda self: "replaced"
+		self.assertEqual(B().test(),"replaced" if get_compilation() == 'lazy' else "A")
@@ -1,5 +1,8 @@
 import unittest
-from mydipy import overload, OverloadObject, inherit
+from mydipy import overload, OverloadObject, OverloadFunction, inherit
+from typing import List
+import warnings
+from mydipy import OverloadWarning
 
 class TestOverload(unittest.TestCase):
 	def setUp(self):
@@ -85,4 +88,177 @@ class TestOverload(unittest.TestCase):
 		# with self.assertRaises(ValueError):	self.cls.test([])
 		with self.assertRaises(AttributeError):	self.cls.test(1,2,3,"h")
 		with self.assertRaises(AttributeError): self.cls.test(val="a",_returns=float)
-		# with self.assertRaises(ValueError): self.cls.test(nam="a",_returns=float)
\ No newline at end of file
+		# with self.assertRaises(ValueError): self.cls.test(nam="a",_returns=float)
+
+	def test_4(self):
+		"""Repeated and re-overloaded calls of an OverloadFunction"""
+		@OverloadFunction
+		def fnc(val: str) -> str: return "str"
+		@fnc.overload
+		def fnc(val: int) -> int: return 1
+
+		self.assertEqual(fnc("a"),"str")
+		self.assertEqual(fnc(1),1)
+		self.assertEqual(fnc(1),1)
+		with self.assertRaises(NotImplementedError): fnc(1,_returns=str)
+
+		# New overloads must be picked up
+		@fnc.overload
+		def fnc(val): return "any"
+		self.assertEqual(fnc(1),1)
+		self.assertEqual(fnc(1,_returns=str),"any")
+		self.assertEqual(fnc(1.0),"any")
+		with self.assertRaises(NotImplementedError): fnc()
+
+	def test_5(self):
+		"""Large overload sets split on arity, keywords and type"""
+		classes = [type("T"+str(i),(),{}) for i in range(20)]
+		def make(typ,i):
+			def fnc(val: typ, *args: int) -> int: return i
+			return fnc
+		fnc = OverloadFunction(make(classes[0],0))
+		for i,typ in enumerate(classes[1:],1):
+			fnc.overload(make(typ,i))
+		@fnc.overload
+		def fnc(val, other: str) -> str: return other
+
+		self.assertListEqual([fnc(typ()) for typ in classes],list(range(20)))
+		self.assertEqual(fnc(classes[3](),1,2),3)
+		self.assertEqual(fnc(1,other="x"),"x")
+		self.assertEqual(fnc(classes[3](),"x"),"x")
+		with self.assertRaises(NotImplementedError): fnc(1)
+
+	def test_6(self):
+		"""Batches of calls grouped by the types of their arguments"""
+		@OverloadFunction
+		def fnc(val: str) -> str: return "str"
+		@fnc.overload
+		def fnc(val: int) -> int: return val
+		@fnc.overload
+		def fnc(val, *args) -> str: return "any"
+
+		calls = [("a",),(1,),(2.0,),(3,),("b",),(1,2)]
+		self.assertListEqual(fnc.map(calls),["str",1,"any",3,"str","any"])
+		self.assertListEqual(fnc.map(iter(calls),_returns=str),["str","any","any","any","str","any"])
+		self.assertListEqual(fnc.map([]),[])
+
+		inst = self.cls
+		calls = [(inst,1),(inst,2.0),(inst,"a"),(inst,3)]
+		self.assertListEqual(type(inst).test.map(calls),[inst.test(*args[1:]) for args in calls])
+		with self.assertRaises(NotImplementedError): fnc.map([(1,),()])
+		# Overloads selecting amongst their own are selected for each call with the same types
+		class P(OverloadObject):
+			def test(self, val: List[int]) -> str: return "parent"
+		class Q(P):
+			@inherit
+			def test(self, val): ...
+			def test(self, val: object): return "fallback"
+		q = Q()
+		self.assertListEqual(Q.test.map([(q,["a"]),(q,[1]),(q,[2]),(q,["b"])]),["fallback","parent","parent","fallback"])
+
+	def test_7(self):
+		"""The most specific overload is selected, and those never or ambiguously selected are warned of"""
+		with warnings.catch_warnings(record=True) as caught:
+			warnings.simplefilter('always')
+			class A(OverloadObject):
+				def test(self, *args, **kwargs): return "any"
+				def test(self, val: int): return "int"
+				def test(self, val: bool): return "bool"
+				def test(self, val: int, *rest): return "int*"
+			self.assertEqual(caught,[])
+
+			a = A()
+			self.assertEqual(a.test(True),"bool")
+			self.assertEqual(a.test(1),"int")
+			self.assertEqual(a.test(1,2),"int*")
+			self.assertEqual(a.test("a"),"any")
+
+			class B(OverloadObject):
+				def test(self, val: int) -> int: return 1
+				def test(self, val: int) -> str: return "2"
+				def test(self, val: int) -> int: return 3
+				def test(self, a: int, b: object): return 4
+				def test(self, a: object, b: int): return 5
+			self.assertEqual(B().test(1),1)
+			self.assertEqual(B().test(1,_returns=str),"2")
+			self.assertEqual(B().test(1,1),4)
+			# Warned when the class is created, or on the first call when compiling lazily
+			messages = [str(w.message) for w in caught if issubclass(w.category,OverloadWarning)]
+			self.assertEqual(len(messages),2)
+			# Signatures are formatted without a space after the colon before Python 3.7
+			self.assertRegex(messages[0],r"#2 \(self, val: ?int\) -> int of 'TestOverload.test_7.<locals>.B.test' is never selected")
+			self.assertRegex(messages[1],r"#3 \(self, a: ?int, b: ?object\) and #4 \(self, a: ?object, b: ?int\)")
+
+	def test_8(self):
+		"""Overloads which can't return the type asked for with `_returns` aren't tried"""
+		class Spy(type):
+			checks = 0
+			def __instancecheck__(cls, obj):
+				Spy.checks += 1
+				return True
+		class Number(metaclass=Spy): pass
+		class A(OverloadObject):
+			def test(self, val: str) -> str: return "str"
+			def test(self, val: Number) -> int: return 1
+			def test(self, val: int): return "any"
+			def test(self, val: int) -> List[str]: return ["list"]
+		a = A()
+		self.assertEqual(a.test(1,_returns=str),"any")
+		self.assertEqual(a.test(1,_returns=list),["list"])
+		with self.assertRaises(NotImplementedError): a.test("a",_returns=list)
+		self.assertEqual(Spy.checks,0)
+		self.assertEqual(a.test(1,_returns=int),1)
+		self.assertGreater(Spy.checks,0)
+
+	def test_9(self):
+		"""Annotations are merged into the overloaded method, leaving those of the first overload alone"""
+		class A(OverloadObject):
+			def test(self, val: int) -> int: return val
+			def test(self, val: str) -> str: return val
+		first = A.test.__wrapped__.__annotations__
+		self.assertEqual((first['val'],first['return']),(int,int))
+		self.assertEqual(set(A.test.__annotations__['val']),{int,str})
+
+	def test_10(self):
+		"""Overloads annotated with a superclass of the type asked for with `_returns` aren't selected"""
+		class P:
+			def test(self): return "parent"
+		class A(OverloadObject):
+			def test(self, val: int) -> object: return "object"
+			def test(self, val: str) -> str: return val
+			@inherit(P)
+			def test(self) -> object: ...
+		with self.assertRaises(NotImplementedError): A().test(1,_returns=int)
+		with self.assertRaises(NotImplementedError): A().test(_returns=int)
+		self.assertEqual(A().test(1),"object")
+		self.assertEqual(A().test(),"parent")
+		@OverloadFunction
+		def fnc() -> int: return 5
+		@fnc.overload
+		def fnc() -> str: return "str"
+		with self.assertRaises(NotImplementedError): fnc(_returns=bool)
+
+	def test_11(self):
+		"""Overloads which select amongst @inherit parents or overloads of their own aren't cached by argument types"""
+		class P(OverloadObject):
+			def t(self, val: List[int]) -> str: return "parent"
+		class Q(P):
+			@inherit
+			def t(self, val): ...
+			def t(self, val: object): return "fallback"
+		q = Q()
+		self.assertEqual(q.t(["a"]),"fallback")
+		self.assertEqual(q.t([1]),"parent")
+
+		@OverloadFunction
+		def inner(val: List[int]): return "ints"
+		@inner.overload
+		def inner(val: List[str]): return "strs"
+		@OverloadFunction
+		def outer(val: int): return "int"
+		outer.overload(inner)
+		@outer.overload
+		def outer(val: object): return "object"
+		self.assertEqual(outer(["a"]),"strs")
+		self.assertEqual(outer([1]),"ints")
+		self.assertEqual(outer([1.0]),"object")
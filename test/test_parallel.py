@@ -0,0 +1,33 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from mydipy import OverloadFunction, OverloadObject
+
+# Defined at module level, so worker processes can look them up by reference
+@OverloadFunction
+def describe(val: int) -> str: return 'int'
+@describe.overload
+def describe(val: str) -> str: return 'str'
+
+class Shape(OverloadObject):
+	def area(self, side: int) -> int: return side*side
+	def area(self, side: float) -> float: return side*side
+
+class TestParallel(unittest.TestCase):
+	def test_1(self):
+		"""Typed functions and methods are pickled by reference, and calls are mapped in chunks by executors"""
+		self.assertIs(pickle.loads(pickle.dumps(describe)),describe)
+		self.assertIs(pickle.loads(pickle.dumps(Shape.area)),Shape.area)
+		self.assertEqual(pickle.loads(pickle.dumps(Shape().area))(2),4)
+
+		calls = [(i,) if i%3 else (str(i),) for i in range(20)]
+		with ThreadPoolExecutor(2) as pool:
+			self.assertEqual(describe.map(calls,_executor=pool,_chunksize=4),describe.map(calls))
+			with self.assertRaises(ValueError): describe.map(calls,_executor=pool,_chunksize=0)
+
+	def test_2(self):
+		"""Calls are mapped by process pools"""
+		shape = Shape()
+		with ProcessPoolExecutor(1) as pool:
+			self.assertEqual(describe.map([(1,),("a",),(2,)],_executor=pool,_chunksize=2),["int","str","int"])
+			self.assertEqual(Shape.area.map([(shape,2),(shape,1.5)],_executor=pool),[4,2.25])
@@ -1,6 +1,8 @@
+import os
+import tempfile
 import unittest
 from typing import Any
-from mydipy import type_check, no_type_check, TypeCheckError
+from mydipy import type_check, no_type_check, TypeCheckError, set_enforcement, get_enforcement, set_compilation, get_compilation, OverloadObject, inherit
 
 class TestRequireType(unittest.TestCase):
 	def setUp(self):
@@ -52,4 +54,112 @@ class TestRequireType(unittest.TestCase):
 		"""Ensure functions reject incorrect arguments"""
 		with self.assertRaises(TypeError):	self.fnc("a")
 		with self.assertRaises(TypeError):	self.inst.int_test("a")
-		with self.assertRaises(TypeError):	self.inst.int_test(1,_returns=str)
\ No newline at end of file
+		with self.assertRaises(TypeError):	self.inst.int_test(1,_returns=str)
+
+	def test_4(self):
+		"""Check defaults, keyword-only and variable arguments"""
+		@type_check
+		def fnc(a: int, b: str = None, *args: float, c: int, **kwargs: str) -> int: return a
+
+		self.assertEqual(fnc(1,c=2),1)
+		self.assertEqual(fnc(1,"b",1.0,2.0,c=2,d="d"),1)
+		with self.assertRaises(TypeCheckError):	fnc(1,2,c=2)
+		with self.assertRaises(TypeCheckError):	fnc(1,"b",1,c=2)
+		with self.assertRaises(TypeCheckError):	fnc(1,c="c")
+		with self.assertRaises(TypeCheckError):	fnc(1,c=2,d=4)
+		with self.assertRaises(TypeCheckError):	fnc(1)
+
+	def test_5(self):
+		"""Match arguments without raising"""
+		self.assertTrue(self.fnc.__match__(1))
+		self.assertTrue(self.fnc.__match__(1,_returns=str))
+		self.assertFalse(self.fnc.__match__("a"))
+		self.assertFalse(self.fnc.__match__(1,_returns=int))
+		self.assertFalse(self.fnc.__match__(1,2))
+		self.assertFalse(self.fnc.__match__(m=1))
+
+
+	def test_6(self):
+		"""Enforcement modes"""
+		try:
+			set_enforcement('off')
+			self.assertEqual(self.fnc("a"),"a")
+			self.assertEqual(self.fnc(1,_returns=int),"1")
+
+			# Per-function settings override the process-wide mode
+			set_enforcement('full',func=self.fnc)
+			self.assertEqual(get_enforcement(self.fnc),'full')
+			with self.assertRaises(TypeError):	self.fnc("a")
+
+			set_enforcement('sampled',every=2,func=self.fnc)
+			with self.assertRaises(TypeError):	self.fnc("a")
+			self.assertEqual(self.fnc("a"),"a")
+			with self.assertRaises(TypeError):	self.fnc("a")
+
+			# Only calls from untyped code are checked
+			@type_check(enforce='boundary')
+			def outer(n: int) -> str: return self.fnc(str(n))
+			set_enforcement('boundary',func=self.fnc)
+			self.assertEqual(outer(1),"1")
+			with self.assertRaises(TypeError):	outer("a")
+			with self.assertRaises(TypeError):	self.fnc("a")
+
+			with self.assertRaises(ValueError):	set_enforcement('sometimes')
+			with self.assertRaises(ValueError):	set_enforcement('sampled',every=0)
+		finally:
+			set_enforcement('full')
+
+	def test_7(self):
+		"""Lazy compilation"""
+		try:
+			set_compilation('lazy')
+			self.assertEqual(get_compilation(),'lazy')
+
+			@type_check
+			def fnc(n: int) -> str: return str(n)
+			self.assertTrue(fnc.__match__(1))
+			self.assertFalse(fnc.__match__("a"))
+			self.assertEqual(fnc(1),"1")
+			with self.assertRaises(TypeCheckError):	fnc("a")
+			with self.assertRaises(TypeCheckError):	fnc(1,_returns=int)
+
+			@type_check
+			def untyped(n): return n
+			self.assertEqual(untyped(1,_returns=int),1)
+
+			class A(OverloadObject):
+				def test(self, val: int) -> str: return "A"
+			class B(A):
+				def test(self, val: str) -> str: return "B"
+				@inherit(A)
+				def test(self, val): ...
+			self.assertEqual(B().test("a"),"B")
+			self.assertEqual(B().test(1),"A")
+			with self.assertRaises(NotImplementedError):	B().test(1.0)
+
+			with self.assertRaises(ValueError):	set_compilation('sometimes')
+		finally:
+			set_compilation('eager')
+
+	def test_8(self):
+		"""Compiled checks are kept on disk until the source changes"""
+		from mydipy.type_check import _Checkers, _checker_files
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp,'checked.py')
+			with open(path,'w') as f:
+				f.write('def fnc(n: int, *, key: str = "") -> int: return n\n')
+			namespace = {}
+			with open(path) as f:
+				exec(compile(f.read(),path,'exec'),namespace)
+			fnc = type_check(namespace['fnc'])
+			self.assertEqual(fnc(1,key="a"),1)
+			with self.assertRaises(TypeCheckError):	fnc(1,key=2)
+
+			checkers = _checker_files.pop(path)
+			self.assertTrue(checkers.code)
+			checkers.save()
+			self.assertEqual(set(_Checkers(path).code),set(checkers.code))
+			# Ignored once the file changes
+			with open(path,'a') as f:
+				f.write('\n')
+			self.assertEqual(_Checkers(path).code,{})
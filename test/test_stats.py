@@ -0,0 +1,86 @@
+import json
+import unittest
+from typing import List
+from mydipy import stats, type_check, OverloadFunction, OverloadObject, inherit, cast
+
+class TestStats(unittest.TestCase):
+	def setUp(self):
+		@type_check
+		def fnc(n: int) -> str: return str(n)
+
+		@OverloadFunction
+		def over(val: str) -> str: return "str"
+		@over.overload
+		def over(val: int) -> int: return 1
+		@over.overload
+		def over(val: int) -> str: return "int"
+
+		class A(OverloadObject):
+			def test(self, val: int) -> int: return val
+		class B(A):
+			@inherit
+			def test(self, val: int) -> int: ...
+
+		self.fnc=fnc
+		self.over=over
+		self.inst=B()
+		stats.reset()
+		stats.enable()
+
+	def tearDown(self):
+		stats.disable()
+		stats.reset()
+
+	def test_1(self):
+		"""Record calls, errors, selected candidates and cast paths"""
+		self.fnc(1)
+		with self.assertRaises(TypeError): self.fnc("a")
+		self.over(1)
+		self.over(2)
+		self.over(3,_returns=str)
+		self.inst.test(3)
+		cast(str,1.5)
+		cast(int,1)
+
+		snap = stats.snapshot()
+		fnc = next(v for k,v in snap['type_check'].items() if k.endswith('fnc'))
+		self.assertEqual(fnc['calls'],2)
+		self.assertEqual(fnc['errors'],1)
+
+		over = next(iter(snap['overload'].values()))
+		self.assertEqual(over['calls'],3)
+		self.assertEqual(over['misses'],2)
+		self.assertEqual(over['rejected'],1)
+		self.assertEqual(sorted(over['selected'].values()),[1,2])
+
+		test = next(iter(snap['inherit'].values()))
+		self.assertEqual(test['selected'],{'TestStats.setUp.<locals>.A':1})
+
+		self.assertEqual(snap['cast']['builtins.float->builtins.str']['paths'],{'constructor':1})
+		self.assertEqual(snap['cast']['builtins.int->builtins.int']['paths'],{'identity':1})
+
+	def test_2(self):
+		"""Snapshots, reset and exports"""
+		self.fnc(1)
+		self.assertEqual(json.loads(stats.to_json()),stats.snapshot())
+		self.assertIn('mydipy_calls_total{kind="type_check",name="test.test_stats.TestStats.setUp.<locals>.fnc"} 1',stats.to_prometheus())
+
+		stats.disable()
+		self.fnc(1)
+		self.assertEqual(next(iter(stats.snapshot()['type_check'].values()))['calls'],1)
+		stats.reset()
+		self.assertEqual(stats.snapshot(),{})
+
+	def test_3(self):
+		"""Overloads skipped as they can't return the type asked for with `_returns` count as rejected"""
+		class A(OverloadObject):
+			def test(self, val: str) -> str: return "str"
+			def test(self, val: int) -> int: return 1
+			def test(self, val: int): return "any"
+			def test(self, val: int) -> List[str]: return ["list"]
+		a = A()
+		self.assertEqual(a.test(1,_returns=str),"any")
+		self.assertEqual(a.test(1,_returns=list),["list"])
+		with self.assertRaises(NotImplementedError): a.test("a",_returns=list)
+		record, = stats.snapshot()['overload'].values()
+		self.assertEqual(record['rejected'],4)
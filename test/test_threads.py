@@ -0,0 +1,40 @@
+import sys
+import threading
+import unittest
+from mydipy import OverloadFunction, cast
+
+class TestThreads(unittest.TestCase):
+	def test_1(self):
+		"""Calls from many threads while overloads and converters are added"""
+		def make(typ):
+			def fnc(val: typ) -> typ: return val
+			return fnc
+		fnc = OverloadFunction(make(int))
+		classes = [type('T{}'.format(i),(),{}) for i in range(50)]
+		class Source: pass
+		errors = []
+		def call():
+			try:
+				for _ in range(500):
+					assert fnc(1) == 1
+					assert cast(str,2) == '2'
+					assert cast(int,Source()) == 3
+			except Exception as e:
+				errors.append(e)
+
+		cast.register(Source,int,lambda obj: 3)
+		self.addCleanup(cast.unregister,Source,int)
+		interval = sys.getswitchinterval()
+		sys.setswitchinterval(1e-6)
+		try:
+			threads = [threading.Thread(target=call) for _ in range(8)]
+			for t in threads: t.start()
+			for typ in classes:
+				fnc.overload(make(typ))
+				cast.register(typ,int,int)
+				self.addCleanup(cast.unregister,typ,int)
+			for t in threads: t.join()
+		finally:
+			sys.setswitchinterval(interval)
+		self.assertEqual(errors,[])
+		self.assertEqual(fnc(classes[-1]()).__class__,classes[-1])
@@ -0,0 +1,74 @@
+import unittest
+import weakref
+from typing import Any, List
+from mydipy import OverloadObject, TypedMeta
+
+class TestTyped(unittest.TestCase):
+	def test_1(self):
+		"""Typed attributes and bulk updates"""
+		class P(OverloadObject):
+			x: int
+			tags: List[str] = []
+			note: Any
+		class Q(P):
+			tags = ["q"]
+
+		p = P()
+		p.x, p.note, p.other = 1, None, "any"
+		self.assertListEqual(p.tags,[])
+		with self.assertRaises(TypeError): p.x = "1"
+		with self.assertRaises(TypeError): p.tags = [1]
+		with self.assertRaises(AttributeError): P().x
+		with self.assertRaises(TypeError): p.update(x=2,tags=[1])
+		self.assertEqual(p.x,1)
+		self.assertIs(p.update(x=2,tags=["a"],other=3),p)
+		self.assertEqual((p.x,p.tags,p.other),(2,["a"],3))
+
+		q = Q()
+		self.assertListEqual(q.tags,["q"])
+		with self.assertRaises(TypeError): q.tags = "q"
+		self.assertSetEqual(set(Q.__fields__),{"x","tags"})
+
+	def test_2(self):
+		"""Slotted typed attributes"""
+		class P(OverloadObject,slots=True):
+			x: int
+			y: float = 1.0
+			def get(self, v: int) -> int: return self.x+v
+			def get(self, v: str) -> str: return v*self.x
+		class Q(P,slots=True):
+			name: str
+			y = 2.0
+
+		p = P()
+		p.x = 2
+		# Fields are kept in the slots, other attributes in the dictionary OverloadObject instances have
+		self.assertDictEqual(vars(p),{})
+		self.assertEqual((p.x,p.y,p.get(1),p.get("a")),(2,1.0,3,"aa"))
+		with self.assertRaises(TypeError): p.x = "1"
+		p.other = 1
+		self.assertDictEqual(vars(p),{"other":1})
+		with self.assertRaises(AttributeError): P().x
+
+		q = Q()
+		self.assertTupleEqual(Q.__slots__,("name",))
+		self.assertIs(q.update(x=1,name="q"),q)
+		self.assertEqual((q.x,q.y,q.name),(1,2.0,"q"))
+		with self.assertRaises(TypeError): q.update(x=2,name=1)
+		self.assertEqual(q.x,1)
+		del q.x
+		with self.assertRaises(AttributeError): q.x
+
+		# Slotted instances can be weakly referenced
+		class R(metaclass=TypedMeta,slots=True):
+			x: int
+		for inst in (p,q,R()):
+			self.assertIs(weakref.ref(inst)(),inst)
+		self.assertTupleEqual(R.__slots__,("x","__weakref__"))
+		with self.assertRaises(AttributeError): R().other = 1
+
+		# Only classes created with slots=True are slotted
+		o = OverloadObject()
+		o.x = 1
+		self.assertIs(weakref.ref(o)(),o)
+		self.assertFalse(hasattr(OverloadObject,"__slots__"))